@@ -0,0 +1,119 @@
+"""
+Time until a campaign can start sending: launching the persistent context
+(config.CDP_URL = None) against attaching over CDP to a Chrome that is
+already running with WhatsApp open.
+
+The Chrome to attach to is started once up front with Playwright's
+Chromium and --remote-debugging-port. Both paths then go through
+sendMessage._open_whatsapp and stop at the logged-in check. The default
+target is a local stub page with a simulated boot; --url points it at
+another copy of the app.
+
+Usage:
+    python bench/bench_browser_startup.py
+    python bench/bench_browser_startup.py --runs 5 --boot-ms 3000
+"""
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+import config  # noqa: E402
+import stubserver  # noqa: E402
+from pages import sendMessage  # noqa: E402
+from pages.sendMessage import _open_whatsapp  # noqa: E402
+
+
+STUB_HTML = """
+<html><body><script>
+setTimeout(() => { document.body.innerHTML = '<div role="grid">chats</div>'; }, %(boot_ms)d);
+</script></body></html>
+"""
+
+
+def serve(boot_ms):
+    """Start the stub on a free port, same page for every path"""
+    return stubserver.serve(STUB_HTML % {"boot_ms": boot_ms})
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_chrome(executable, port, profile, url):
+    """The operator's long-running Chrome, already on the app"""
+    # --no-sandbox like Playwright's own launches, so it also starts as root (containers, CI)
+    return subprocess.Popen(
+        [executable, "--headless=new", "--no-sandbox", f"--remote-debugging-port={port}",
+         f"--user-data-dir={profile}", "--no-first-run", "--no-default-browser-check", url],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def timed_open(p, profile, cdp_url):
+    logs = []
+    start = time.perf_counter()
+    opened = await _open_whatsapp(p, profile, logs.append, cdp_url)
+    elapsed = time.perf_counter() - start
+    if opened is None or any(line.startswith("⚠️") for line in logs):
+        raise RuntimeError("; ".join(logs))
+    await opened[0].close()
+    return elapsed
+
+
+async def main():
+    args = sys.argv[1:]
+    runs = int(args[args.index("--runs") + 1]) if "--runs" in args else 3
+    boot_ms = int(args[args.index("--boot-ms") + 1]) if "--boot-ms" in args else 1500
+    server = None
+    if "--url" in args:
+        config.WHATSAPP_URL = args[args.index("--url") + 1].rstrip("/")
+    else:
+        server = serve(boot_ms)
+        config.WHATSAPP_URL = f"http://127.0.0.1:{server.server_port}"
+
+    workdir = tempfile.mkdtemp(prefix="wa-startup-")
+    chrome = None
+    try:
+        async with async_playwright() as p:
+            # The launch path runs headless here so it is comparable with the attached Chrome
+            launch = p.chromium.launch_persistent_context
+
+            async def headless_launch(**kwargs):
+                kwargs["headless"] = True
+                return await launch(**kwargs)
+
+            p.chromium.launch_persistent_context = headless_launch
+            sendMessage.browser_path = None
+
+            port = free_port()
+            chrome = start_chrome(p.chromium.executable_path, port, os.path.join(workdir, "attached"),
+                                  config.WHATSAPP_URL + "/")
+            cdp_url = f"http://127.0.0.1:{port}"
+            await asyncio.sleep(2)  # let it come up and boot the app once
+
+            print(f"{'path':<8} " + " ".join(f"{'run ' + str(i + 1):>9}" for i in range(runs)) + f" {'best':>8}")
+            for label, url in (("launch", None), ("attach", cdp_url)):
+                times = [await timed_open(p, os.path.join(workdir, "launched"), url) for _ in range(runs)]
+                print(f"{label:<8} " + " ".join(f"{t * 1000:>7.0f}ms" for t in times) + f" {min(times) * 1000:>6.0f}ms")
+    finally:
+        if chrome is not None:
+            chrome.terminate()
+            chrome.wait()
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""
+Time per chat for each chat-open strategy (pages/chatOpen.py).
+
+Serves a local stub of the WhatsApp Web SPA: every full page load pays a boot
+delay before the app renders, while the app itself opens chats through its
+router (load + popstate), intercepted /send links and the new-chat search.
+Numbers ending in 0 get the invalid-number alert. Each strategy also reports
+how many full reloads it caused, i.e. how often it fell back to goto.
+
+Usage:
+    python bench/bench_chat_open.py
+    python bench/bench_chat_open.py --chats 20 --boot-ms 1500 --strategies goto,route
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+import config  # noqa: E402
+import stubserver  # noqa: E402
+from pages.chatOpen import STRATEGIES, CHAT_READY, CHAT_INVALID, open_chat, reset_strategy_misses  # noqa: E402
+
+
+STUB_HTML = """
+<html><body>
+<header><span data-icon="new-chat-outline" id="new-chat">+</span></header>
+<div id="search" hidden><div contenteditable="true" data-tab="3"></div></div>
+<div id="main"></div>
+<div id="alerts"></div>
+<script>
+const BOOT_MS = %(boot_ms)d;
+sessionStorage.boots = Number(sessionStorage.boots || 0) + 1;
+const main = document.getElementById("main");
+const alerts = document.getElementById("alerts");
+const search = document.getElementById("search");
+
+function openChat(phone) {
+    alerts.textContent = "";
+    if (!phone) return;
+    if (phone.endsWith("0")) {
+        setTimeout(() => {
+            alerts.innerHTML = '<div role="alert">Phone number shared via url is invalid.</div>';
+        }, 30);
+        return;
+    }
+    // A new chat mounts a new composer, like WhatsApp's editor
+    setTimeout(() => {
+        main.innerHTML = '<header>' + phone + '</header>'
+            + '<footer><div contenteditable="true" role="textbox"></div></footer>';
+    }, 30);
+}
+
+function route() {
+    openChat(new URLSearchParams(location.search).get("phone"));
+}
+
+document.addEventListener("click", (e) => {
+    const a = e.target.closest("a");
+    if (a && new URL(a.href).pathname === "/send") {
+        e.preventDefault();
+        history.pushState({}, "", a.href);
+        route();
+    }
+});
+document.getElementById("new-chat").addEventListener("click", () => {
+    search.hidden = false;
+    search.firstElementChild.focus();
+});
+search.addEventListener("keydown", (e) => {
+    if (e.key === "Enter") {
+        e.preventDefault();
+        const box = search.firstElementChild;
+        const phone = box.innerText.replace(/[^0-9]/g, "");
+        box.textContent = "";
+        search.hidden = true;
+        openChat(phone);
+    }
+});
+window.addEventListener("popstate", route);
+setTimeout(route, BOOT_MS);
+</script>
+</body></html>
+"""
+
+
+def serve(boot_ms):
+    """Start the stub on a free port, same page for every path"""
+    return stubserver.serve(STUB_HTML % {"boot_ms": boot_ms})
+
+
+async def bench_strategy(page, strategy, phones):
+    reset_strategy_misses()
+    await page.goto(config.WHATSAPP_URL + "/")
+    boots_before = int(await page.evaluate("sessionStorage.boots"))
+    ok = 0
+    start = time.perf_counter()
+    for phone in phones:
+        outcome, _ = await open_chat(page, phone, strategy=strategy)
+        expected = CHAT_INVALID if phone.endswith("0") else CHAT_READY
+        ok += outcome == expected
+    elapsed = time.perf_counter() - start
+    reloads = int(await page.evaluate("sessionStorage.boots")) - boots_before
+    return elapsed / len(phones), reloads, ok
+
+
+async def main():
+    args = sys.argv[1:]
+    count = int(args[args.index("--chats") + 1]) if "--chats" in args else 10
+    boot_ms = int(args[args.index("--boot-ms") + 1]) if "--boot-ms" in args else 800
+    strategies = args[args.index("--strategies") + 1].split(",") if "--strategies" in args else list(STRATEGIES)
+    phones = [f"+2519{11223340 + i:08d}" for i in range(count)]
+
+    server = serve(boot_ms)
+    config.WHATSAPP_URL = f"http://127.0.0.1:{server.server_port}"
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            page = await browser.new_page()
+            print(f"{'strategy':<10} {'ms/chat':>9} {'reloads':>8}  correct")
+            for strategy in strategies:
+                per_chat, reloads, ok = await bench_strategy(page, strategy, phones)
+                print(f"{strategy:<10} {per_chat * 1000:>9.1f} {reloads:>8}  {ok}/{len(phones)}")
+            await browser.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
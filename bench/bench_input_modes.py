@@ -0,0 +1,95 @@
+"""
+Time per message for each composer input mode (pages/messageInput.py).
+
+Runs headless Chromium against a local stub of the WhatsApp composer: a
+contenteditable footer that, like WhatsApp's editor, handles beforeinput and
+paste itself and "sends" on Enter. Every mode is also checked for delivering
+the exact text, including the Amharic greeting.
+
+Usage:
+    python bench/bench_input_modes.py
+    python bench/bench_input_modes.py --messages 10 --modes insert_text,paste
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+from pages.messageInput import INPUT_MODES, enter_message  # noqa: E402
+from pages.sendMessage import compose_messages  # noqa: E402
+
+
+STUB_HTML = """
+<html><body>
+<div id="sent"></div>
+<footer><div contenteditable="true" role="textbox" id="composer"></div></footer>
+<script>
+const composer = document.getElementById("composer");
+const sent = [];
+function insert(text) {
+    const sel = window.getSelection();
+    const range = document.createRange();
+    range.selectNodeContents(composer);
+    range.collapse(false);
+    range.insertNode(document.createTextNode(text));
+    range.collapse(false);
+    sel.removeAllRanges();
+    sel.addRange(range);
+}
+composer.addEventListener("beforeinput", (e) => {
+    if (e.inputType === "insertText" && e.data) { e.preventDefault(); insert(e.data); }
+});
+composer.addEventListener("paste", (e) => {
+    e.preventDefault();
+    insert(e.clipboardData.getData("text/plain"));
+});
+composer.addEventListener("keydown", (e) => {
+    if (e.key === "Enter") {
+        e.preventDefault();
+        sent.push(composer.innerText);
+        composer.textContent = "";
+    }
+});
+window.lastSent = () => sent[sent.length - 1];
+</script>
+</body></html>
+"""
+
+
+async def bench_mode(page, composer, mode, messages):
+    elapsed = 0.0
+    ok = True
+    for msg in messages:
+        start = time.perf_counter()
+        await enter_message(page, composer, msg, mode)
+        await page.keyboard.press("Enter")
+        elapsed += time.perf_counter() - start
+        ok = ok and (await page.evaluate("lastSent()")) == msg
+    return elapsed / len(messages), ok
+
+
+async def main():
+    args = sys.argv[1:]
+    count = int(args[args.index("--messages") + 1]) if "--messages" in args else 4
+    modes = args[args.index("--modes") + 1].split(",") if "--modes" in args else list(INPUT_MODES)
+    messages = (compose_messages("Addis Software Solutions PLC", "Website") * count)[:count]
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(STUB_HTML)
+        composer = await page.wait_for_selector('footer div[contenteditable="true"]')
+
+        print(f"{'mode':<12} {'ms/message':>11}  text ok")
+        for mode in modes:
+            per_msg, ok = await bench_mode(page, composer, mode, messages)
+            print(f"{mode:<12} {per_msg * 1000:>11.1f}  {'yes' if ok else 'NO'}")
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Load/save timings of a contacted-style state file under each JSON codec.
+
+"json (indent=2)" is the old on-disk format and the baseline; the other rows
+are the compact files written with config.JSON_PRETTY = False.
+
+Usage:
+    python bench/bench_json_codecs.py
+    python bench/bench_json_codecs.py --sizes 10000,100000 --repeat 5
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec  # noqa: E402
+
+
+def make_entries(n):
+    return [{"businessName": f"Business {i} Software PLC", "phone": f"+2519{i:08d}"} for i in range(n)]
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(entries, name, pretty, repeat, path):
+    c = codec.get_codec(name)
+
+    def save():
+        with open(path, "wb") as f:
+            f.write(c.dumps(entries, pretty))
+
+    def load():
+        with open(path, "rb") as f:
+            c.loads(f.read())
+
+    save_s = best_of(repeat, save)
+    size = os.path.getsize(path)
+    load_s = best_of(repeat, load)
+    return save_s, load_s, size
+
+
+def main():
+    args = sys.argv[1:]
+    sizes = [int(s) for s in (args[args.index("--sizes") + 1] if "--sizes" in args else "10000,100000,1000000").split(",")]
+    repeat = int(args[args.index("--repeat") + 1]) if "--repeat" in args else 3
+    variants = [("json", True)] + [(name, False) for name in reversed(codec.available_codecs())]
+
+    print(f"codecs installed: {', '.join(codec.available_codecs())}")
+    print(f"{'entries':>9}  {'codec':<16} {'save ms':>9} {'load ms':>9} {'size MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.json")
+        for n in sizes:
+            entries = make_entries(n)
+            for name, pretty in variants:
+                save_s, load_s, size = bench(entries, name, pretty, repeat, path)
+                label = f"{name} (indent=2)" if pretty else name
+                print(f"{n:>9}  {label:<16} {save_s * 1000:>9.1f} {load_s * 1000:>9.1f} {size / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Time per contact with and without config.LOOKAHEAD (sendMessage._run_pipeline).
+
+Serves a local stub of a WhatsApp Web chat: every page load pays a boot delay
+before the composer renders, and every message sent with Enter gets its
+sent tick after a confirmation delay. Both runs go through the real
+_process_business / _run_pipeline with inline confirmation (no deferred
+batch), no pacing limits and the "goto" chat-open strategy; only the sink is
+a counter, so no state file is touched. Each run must confirm every contact.
+
+Usage:
+    python bench/bench_lookahead.py
+    python bench/bench_lookahead.py --contacts 20 --boot-ms 1500 --confirm-ms 1000
+"""
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+import config  # noqa: E402
+import stubserver  # noqa: E402
+from pages.sendMessage import _process_business, _run_pipeline  # noqa: E402
+from scheduler import RateScheduler  # noqa: E402
+
+
+STUB_HTML = """
+<html><body>
+<div id="main"></div>
+<script>
+const BOOT_MS = %(boot_ms)d, CONFIRM_MS = %(confirm_ms)d;
+const main = document.getElementById("main");
+setTimeout(() => {
+    main.innerHTML = '<div id="messages"></div>'
+        + '<footer><div contenteditable="true" role="textbox"></div></footer>';
+    const composer = main.querySelector("footer div");
+    composer.addEventListener("keydown", (e) => {
+        if (e.key !== "Enter") return;
+        e.preventDefault();
+        const msg = document.createElement("div");
+        msg.textContent = composer.innerText;
+        composer.textContent = "";
+        document.getElementById("messages").appendChild(msg);
+        setTimeout(() => {
+            msg.insertAdjacentHTML("beforeend", '<span data-icon="msg-check">✓</span>');
+        }, CONFIRM_MS);
+    });
+}, BOOT_MS);
+</script>
+</body></html>
+"""
+
+
+def serve(boot_ms, confirm_ms):
+    """Start the stub on a free port, same page for every path"""
+    return stubserver.serve(STUB_HTML % {"boot_ms": boot_ms, "confirm_ms": confirm_ms})
+
+
+class CountingSink:
+    """The CampaignSink calls the send path makes, only counted"""
+
+    def __init__(self):
+        self.result = Counter()
+
+    def count(self, key, n=1):
+        self.result[key] += n
+
+    def is_contacted(self, phone):
+        return False
+
+    def mark(self, phone, state):
+        pass
+
+    def processed(self, phone):
+        pass
+
+    def contacted(self, name, phone):
+        pass
+
+    def failed(self, name, phone, reason, error=None):
+        pass
+
+    def observed(self, phone, status):
+        pass
+
+
+async def bench(browser, businesses, lookahead):
+    page = await browser.new_page()
+    sink = CountingSink()
+    pacer = RateScheduler()
+    args = ("Website", lambda text: None, lambda phone, text, tag: None, sink, set(), set(), pacer, "insert_text")
+    start = time.perf_counter()
+    if lookahead:
+        await _run_pipeline(browser, page, businesses, *args)
+    else:
+        for biz in businesses:
+            await _process_business(page, biz, *args)
+    elapsed = time.perf_counter() - start
+    await page.close()
+    return elapsed, sink.result["contacted"]
+
+
+async def main():
+    args = sys.argv[1:]
+    count = int(args[args.index("--contacts") + 1]) if "--contacts" in args else 10
+    boot_ms = int(args[args.index("--boot-ms") + 1]) if "--boot-ms" in args else 800
+    confirm_ms = int(args[args.index("--confirm-ms") + 1]) if "--confirm-ms" in args else 800
+    businesses = [{"businessName": f"Business {i}", "phone": f"+2519{11223341 + i:08d}"} for i in range(count)]
+
+    server = serve(boot_ms, confirm_ms)
+    config.WHATSAPP_URL = f"http://127.0.0.1:{server.server_port}"
+    config.CHAT_OPEN_STRATEGY = "goto"
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            print(f"{'lookahead':<10} {'total s':>8} {'ms/contact':>11}  confirmed")
+            complete = True
+            for lookahead in (False, True):
+                elapsed, confirmed = await bench(browser, businesses, lookahead)
+                label = "on" if lookahead else "off"
+                print(f"{label:<10} {elapsed:>8.2f} {elapsed / count * 1000:>11.1f}  {confirmed}/{count}")
+                complete = complete and confirmed == count
+            await browser.close()
+    finally:
+        server.shutdown()
+    if not complete:
+        print("FAIL: not every contact was confirmed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
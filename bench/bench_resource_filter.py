@@ -0,0 +1,188 @@
+"""
+Bandwidth and renderer CPU per chat with the resource filter on and off
+(pages/resourceFilter.py).
+
+Serves a local page shaped like a WhatsApp chat load: avatar images, a
+sticker, a video thumbnail, a web font and the composer. The page itself is
+sent gzip-compressed and chunked, without a Content-Length. Every "chat" is
+a full goto, as with CHAT_OPEN_STRATEGY = "goto". Bytes are counted by the
+server (what actually went over the wire) and CPU is Chromium's
+TaskDuration metric.
+
+It also checks the filter and exits non-zero if a check fails:
+- with image/media/font blocked, none of those assets reaches the server;
+- the composer shows up in every chat, with the filter on and off;
+- with the filter on, its byte count covers at least what the server sent
+  (only the chunked page gets through then). With it off the server's count
+  isn't comparable: Chromium drops the random-byte images part way.
+
+Usage:
+    python bench/bench_resource_filter.py
+    python bench/bench_resource_filter.py --chats 30 --images 60
+"""
+import asyncio
+import gzip
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+from pages.chatOpen import COMPOSER_SELECTOR  # noqa: E402
+from pages.resourceFilter import ResourceFilter  # noqa: E402
+
+
+ASSETS = {
+    "/avatar.jpg": ("image/jpeg", 40 * 1024),
+    "/sticker.webp": ("image/webp", 60 * 1024),
+    "/clip.mp4": ("video/mp4", 400 * 1024),
+    "/font.woff2": ("font/woff2", 90 * 1024),
+}
+
+
+def chat_html(images):
+    avatars = "".join(f'<img src="/avatar.jpg?{i}" width="40">' for i in range(images))
+    return f"""
+<html><head><style>
+@font-face {{ font-family: "Chat"; src: url("/font.woff2") format("woff2"); }}
+body {{ font-family: "Chat", sans-serif; }}
+</style></head><body>
+<div id="side">{avatars}</div>
+<div id="main">
+  <img src="/sticker.webp"><video src="/clip.mp4" preload="auto" muted></video>
+  <footer><div contenteditable="true" role="textbox"></div></footer>
+</div>
+</body></html>
+""".encode("utf-8")
+
+
+def serve(images):
+    page = gzip.compress(chat_html(images))
+    sent = [0]
+    hits = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            hits[path] = hits.get(path, 0) + 1
+            if path not in ASSETS:
+                self._send_chunked(page)
+                return
+            content_type, size = ASSETS[path]
+            body = os.urandom(size)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self._write(body)
+
+        def _send_chunked(self, body):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            for i in range(0, len(body), 4096):
+                chunk = body[i:i + 4096]
+                self._write(b"%x\r\n" % len(chunk) + chunk + b"\r\n", len(chunk))
+            self._write(b"0\r\n\r\n", 0)
+
+        def _write(self, raw, counted=None):
+            try:
+                self.wfile.write(raw)
+                sent[0] += len(raw) if counted is None else counted
+            except OSError:
+                pass  # aborted by the client
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, sent, hits
+
+
+async def task_seconds(cdp):
+    metrics = (await cdp.send("Performance.getMetrics"))["metrics"]
+    return next(m["value"] for m in metrics if m["name"] == "TaskDuration")
+
+
+async def bench(p, base_url, sent, hits, chats, resource_types):
+    browser = await p.chromium.launch(headless=True)
+    context = await browser.new_context()
+    res_filter = ResourceFilter(resource_types=resource_types)
+    await res_filter.install(context)
+    page = await context.new_page()
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Performance.enable")
+
+    hits.clear()
+    sent_before, cpu_before, ok = sent[0], await task_seconds(cdp), 0
+    start = time.perf_counter()
+    for i in range(chats):
+        await page.goto(f"{base_url}/send?phone={i}", wait_until="load")
+        ok += await page.query_selector(COMPOSER_SELECTOR) is not None
+    elapsed = time.perf_counter() - start
+    cpu = await task_seconds(cdp) - cpu_before
+    await asyncio.sleep(0.5)  # let the last requestfinished handlers read their sizes
+    await res_filter.remove()
+    await browser.close()
+    return {
+        "sent": sent[0] - sent_before, "cpu": cpu, "wall": elapsed, "ok": ok, "filter": res_filter,
+        "asset_hits": sum(n for path, n in hits.items() if path in ASSETS),
+    }
+
+
+def check(label, run, chats, blocking):
+    """Failed checks of one run, as messages"""
+    failures = []
+    if run["ok"] != chats:
+        failures.append(f"{label}: composer missing in {chats - run['ok']} of {chats} chat(s)")
+    if blocking and run["asset_hits"]:
+        failures.append(f"{label}: {run['asset_hits']} image/media/font request(s) reached the server")
+    if blocking and not run["filter"].blocked:
+        failures.append(f"{label}: nothing was blocked")
+    if blocking and run["filter"].bytes_loaded < run["sent"]:
+        failures.append(f"{label}: counted {run['filter'].bytes_loaded} bytes, the server sent {run['sent']}")
+    return failures
+
+
+async def main():
+    args = sys.argv[1:]
+    chats = int(args[args.index("--chats") + 1]) if "--chats" in args else 15
+    images = int(args[args.index("--images") + 1]) if "--images" in args else 30
+
+    server, sent, hits = serve(images)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    failures = []
+    try:
+        async with async_playwright() as p:
+            print(f"{'filter':<18} {'KB/chat':>8} {'counted':>8} {'CPU ms/chat':>12} {'ms/chat':>8} "
+                  f"{'blocked':>8} {'served':>7}  composer")
+            for label, types in (("off", ()), ("image/media/font", ("image", "media", "font"))):
+                run = await bench(p, base_url, sent, hits, chats, types)
+                print(f"{label:<18} {run['sent'] / chats / 1024:>8.1f} "
+                      f"{run['filter'].bytes_loaded / chats / 1024:>8.1f} {run['cpu'] / chats * 1000:>12.1f} "
+                      f"{run['wall'] / chats * 1000:>8.1f} {run['filter'].blocked:>8} {run['asset_hits']:>7}  "
+                      f"{run['ok']}/{chats}")
+                failures += check(label, run, chats, bool(types))
+    finally:
+        server.shutdown()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: blocked assets never reached the server, the composer rendered in every chat")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
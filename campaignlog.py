@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+
+from phones import normalize_phone
+from writer import write_json_atomic
+
+
+# Per-contact states in the order a send goes through them
+QUEUED = "queued"
+OPENING = "opening"
+TYPED = "typed"
+SENT = "sent"            # typed and sent, delivery check deferred
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+DONE_STATES = (CONFIRMED, FAILED, SENT)
+IN_DOUBT_STATES = (OPENING, TYPED)
+
+
+class RecoveredCampaign:
+    def __init__(self, template_choice, started_at, businesses, states, input_mode=None):
+        self.template_choice = template_choice
+        self.input_mode = input_mode
+        self.started_at = started_at
+        self.businesses = businesses
+        self.states = states
+
+    def state_of(self, phone):
+        return self.states.get(normalize_phone(phone), QUEUED)
+
+    def remaining(self):
+        """Businesses that still need work, in campaign order"""
+        return [b for b in self.businesses if self.state_of(b.get("phone")) not in DONE_STATES]
+
+    def in_doubt(self):
+        """Phones that were being opened or typed when the run stopped"""
+        return {k for k, s in self.states.items() if s in IN_DOUBT_STATES}
+
+    def done_count(self):
+        return sum(1 for s in self.states.values() if s in DONE_STATES)
+
+
+class CampaignLog:
+    """
+    Write-ahead log of the current campaign.
+
+    A checkpoint file holds the campaign header (template, business list) plus
+    the per-phone states at the time it was written; the WAL holds one line per
+    state transition since then. Each transition is written (and flushed) before
+    the browser acts on it, so after a crash `recover()` knows exactly which
+    contacts are finished and which were mid-send and need re-verifying.
+    Every `checkpoint_every` transitions the WAL is folded into the checkpoint.
+    """
+
+    def __init__(self, wal_file, checkpoint_file, checkpoint_every=100):
+        self.wal_file = wal_file
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.Lock()
+        self._fh = None
+        self._header = None
+        self._states = {}
+        self._since_checkpoint = 0
+
+    # -------------------------------
+    # Recording
+    # -------------------------------
+
+    def begin(self, businesses, template_choice, input_mode=None):
+        """Start a new campaign, discarding any previous log"""
+        with self._lock:
+            self._header = {
+                "template": template_choice,
+                "input_mode": input_mode,
+                "started_at": time.time(),
+                "businesses": list(businesses),
+            }
+            self._states = {}
+            self._checkpoint()
+
+    def attach(self, recovered):
+        """Continue appending to a recovered campaign"""
+        with self._lock:
+            self._header = {
+                "template": recovered.template_choice,
+                "input_mode": recovered.input_mode,
+                "started_at": recovered.started_at,
+                "businesses": recovered.businesses,
+            }
+            self._states = dict(recovered.states)
+            self._checkpoint()
+
+    def mark(self, phone, state):
+        key = normalize_phone(phone)
+        line = json.dumps({"p": key, "s": state, "t": round(time.time(), 3)}) + "\n"
+        with self._lock:
+            if self._header is None:
+                return
+            self._states[key] = state
+            if self._fh is None:
+                self._fh = open(self.wal_file, "a", encoding="utf-8")
+            # Written synchronously on purpose: the record has to exist
+            # before the browser performs the step it describes.
+            self._fh.write(line)
+            self._fh.flush()
+            self._since_checkpoint += 1
+            if self._since_checkpoint >= self.checkpoint_every:
+                self._checkpoint()
+
+    def finish(self):
+        """Campaign ran to the end, nothing left to resume"""
+        with self._lock:
+            self._close()
+            self._header = None
+            self._states = {}
+            for path in (self.wal_file, self.checkpoint_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _checkpoint(self):
+        write_json_atomic(self.checkpoint_file, dict(self._header, states=self._states), pretty=False)
+        self._close()
+        if os.path.exists(self.wal_file):
+            os.remove(self.wal_file)
+        self._since_checkpoint = 0
+
+    def _close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    # -------------------------------
+    # Recovery
+    # -------------------------------
+
+    def has_unfinished(self):
+        return os.path.exists(self.checkpoint_file)
+
+    def recover(self):
+        """Checkpoint + WAL replay, or None when there is no unfinished campaign"""
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                header = json.load(f)
+        except Exception:
+            return None
+        states = dict(header.get("states", {}))
+        if os.path.exists(self.wal_file):
+            with open(self.wal_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    states[record["p"]] = record["s"]
+        return RecoveredCampaign(
+            header.get("template", "Website"),
+            header.get("started_at"),
+            header.get("businesses", []),
+            states,
+            header.get("input_mode"),
+        )
@@ -0,0 +1,106 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, faster encode/decode
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional, faster encode/decode
+    msgspec = None
+
+import config
+
+
+class StdlibCodec:
+    name = "json"
+
+    def dumps(self, data, pretty=False):
+        return json.dumps(data, indent=2 if pretty else None, ensure_ascii=False,
+                          separators=None if pretty else (",", ":")).encode("utf-8")
+
+    def loads(self, raw):
+        return json.loads(raw)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def dumps(self, data, pretty=False):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    def loads(self, raw):
+        return orjson.loads(raw)
+
+
+class MsgspecCodec:
+    name = "msgspec"
+
+    def dumps(self, data, pretty=False):
+        raw = msgspec.json.encode(data)
+        return msgspec.json.format(raw, indent=2) if pretty else raw
+
+    def loads(self, raw):
+        try:
+            return msgspec.json.decode(raw)
+        except msgspec.DecodeError as e:
+            # Callers treat ValueError as "corrupt line/file", like json does
+            raise ValueError(str(e)) from e
+
+
+CODECS = {
+    "orjson": OrjsonCodec if orjson is not None else None,
+    "msgspec": MsgspecCodec if msgspec is not None else None,
+    "json": StdlibCodec,
+}
+
+_instances = {}
+
+
+def available_codecs():
+    """Names of the codecs usable in this environment, fastest first"""
+    return [name for name, cls in CODECS.items() if cls is not None]
+
+
+def get_codec(name="auto"):
+    """
+    Codec instance by name. "auto" picks the fastest installed one; asking for
+    a library that isn't installed falls back to the stdlib codec.
+    """
+    if name == "auto":
+        name = available_codecs()[0]
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec {name!r}, expected one of {', '.join(CODECS)} or 'auto'")
+    if CODECS[name] is None:
+        print(f"JSON codec {name!r} is not installed, using the standard library")
+        name = "json"
+    codec = _instances.get(name)
+    if codec is None:
+        codec = _instances[name] = CODECS[name]()
+    return codec
+
+
+def current():
+    """The codec selected by config.JSON_CODEC"""
+    return get_codec(config.JSON_CODEC)
+
+
+# -------------------------------
+# Shortcuts used by the state files
+# -------------------------------
+
+def dumps(data, pretty=None):
+    """Encode to bytes, compact unless `pretty` (default config.JSON_PRETTY)"""
+    if pretty is None:
+        pretty = config.JSON_PRETTY
+    return current().dumps(data, pretty)
+
+
+def loads(raw):
+    return current().loads(raw)
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -6,12 +6,145 @@ PENDING_FILE = os.path.join(BASE_DIR, "pending.json")
 CONTACTED_FILE = os.path.join(BASE_DIR, "contacted.json")
 FAILED_FILE = os.path.join(BASE_DIR, "failed.json")
 CONTACTED_NUMBERS_FILE = os.path.join(BASE_DIR, "contacted.json")
+CONTACTED_JOURNAL_FILE = os.path.join(BASE_DIR, "contacted.jsonl")
+FAILED_JOURNAL_FILE = os.path.join(BASE_DIR, "failed.jsonl")
+PENDING_LOG_FILE = os.path.join(BASE_DIR, "pending.log")
+CONTACTED_INDEX_FILE = os.path.join(BASE_DIR, "contacted.idx")
+CAMPAIGN_WAL_FILE = os.path.join(BASE_DIR, "campaign.wal")
+CAMPAIGN_CHECKPOINT_FILE = os.path.join(BASE_DIR, "campaign.checkpoint.json")
+STATE_DB_FILE = os.path.join(BASE_DIR, "state.db")
+UNCONFIRMED_FILE = os.path.join(BASE_DIR, "unconfirmed.json")
+UNCONFIRMED_JOURNAL_FILE = os.path.join(BASE_DIR, "unconfirmed.jsonl")
+VALIDITY_FILE = os.path.join(BASE_DIR, "validity.json")
+RETRY_FILE = os.path.join(BASE_DIR, "retry.json")
+
+# Persistence settings
+# "json" keeps the lists below in memory and on disk as JSON files,
+# "sqlite" keeps them in STATE_DB_FILE and only loads the pending queue.
+STATE_BACKEND = "json"
+
+# With the journal on, contacted/failed outcomes are appended one line per event
+# and folded into the JSON snapshots in the background.
+USE_JOURNAL = True
+JOURNAL_COMPACT_EVERY = 500
+# With the journal on, keep a memory-mapped index of contacted numbers so
+# startup doesn't parse contacted.json; full records are loaded on demand.
+USE_PHONE_INDEX = True
+# All state-file writes go through one background writer thread so neither the
+# send loop nor Tk ever waits on the disk. helper.flush_writes() before exit.
+ASYNC_WRITES = True
+# Queued writes past which the send loop waits for the writer before the next chat
+WRITE_QUEUE_SIZE = 10_000
+# Processed numbers are appended to PENDING_LOG_FILE, pending.json is only
+# rewritten after this many removals
+PENDING_COMPACT_EVERY = 200
+# Campaign write-ahead log is folded into its checkpoint after this many transitions
+CAMPAIGN_CHECKPOINT_EVERY = 100
+# JSON library for the state files: "auto" (orjson, then msgspec, then stdlib),
+# "orjson", "msgspec" or "json". Files are written compact unless JSON_PRETTY,
+# use export_state.py for a readable copy.
+JSON_CODEC = "auto"
+JSON_PRETTY = False
+
+# Sending
+WHATSAPP_URL = "https://web.whatsapp.com"
+# Browser profile directories, one logged-in WhatsApp account each. With more
+# than one, every profile gets its own worker process and Chromium and they
+# share the campaign (see pages/shardSender.py).
+SESSION_PROFILES = ["./whatsapp_session"]
+# Attach to a Chrome the operator keeps open instead of launching one, e.g.
+#   chrome --remote-debugging-port=9222 --user-data-dir=./whatsapp_session
+# and reuse its WhatsApp tab; launching stays the fallback when nothing
+# listens there. None always launches. Single-profile campaigns only.
+CDP_URL = None
+# Keep the logged-in browser open between campaigns (pages/senderService.py),
+# so only the first "Start Sending" pays for the launch and login
+KEEP_BROWSER_OPEN = True
+# Start that browser and the login check as soon as the contacts are being
+# reviewed, so it is ready by the time "Start Sending" is pressed
+PREWARM_BROWSER = True
+# Tabs of the logged-in browser that send in parallel (1 = one contact at a time).
+# WhatsApp Web may park extra tabs of the same session on its "Use here"
+# screen; if tabs keep reporting "No composer", go back to 1.
+MAX_TABS = 1
+# With one tab, open the next contact's chat in a second tab while the
+# current one is typed and confirmed (same "Use here" caveat as MAX_TABS)
+LOOKAHEAD = False
+# Check every number of a batch first (open the chat, no typing) from
+# VALIDATE_TABS tabs, drop the invalid ones from pending in one go and only
+# send to the reachable ones. These opens wait for the pacing below and count
+# against DAILY_CAP like any chat open (a validated number that is then sent
+# to uses two), on top of VALIDATE_GAP per tab.
+PREVALIDATE = False
+VALIDATE_TABS = 2
+VALIDATE_GAP = ("uniform", 1.0, 2.5)
+# Pacing per session (profile), see scheduler.RateScheduler. Rates are chats
+# opened; 0 disables a limit. BURST chats may go out back to back.
+RATE_PER_MINUTE = 4
+RATE_PER_HOUR = 120
+RATE_BURST = 2
+DAILY_CAP = 600
+# Pauses as (distribution, a, b): "uniform" low/high, "gauss" mean/stddev,
+# "lognormal" median/sigma, "exponential" minimum/mean extra, or None
+CHAT_JITTER = ("lognormal", 2.0, 0.5)
+MESSAGE_GAP = ("uniform", 0.8, 1.4)
+# How messages are entered in the composer (default for new campaigns):
+# "human" types key by key, "insert_text", "paste" and "input_event" put the
+# whole message in at once, see pages/messageInput.py
+INPUT_MODE = "human"
+# How each chat is opened: "goto" loads the send URL (reboots the app every
+# contact), "route", "link" and "search" stay inside the loaded app (see
+# pages/chatOpen.py) and fall back to "goto" when the chat doesn't switch
+# within CHAT_SWITCH_TIMEOUT ms
+CHAT_OPEN_STRATEGY = "goto"
+CHAT_SWITCH_TIMEOUT = 3_000
+# Request types the sending browser doesn't download (Playwright resource
+# types, e.g. "image", "media", "font", "stylesheet"); () turns the filter off.
+# "abort" fails them, "stub" answers images with a blank GIF and aborts the rest.
+BLOCK_RESOURCES = ("image", "media", "font")
+BLOCK_MODE = "abort"
+# Don't wait for the ticks after every contact: record it as sent-unconfirmed
+# and check all of them in one batch after the main pass
+# (pages/deliveryVerifier.py). A message still pending CONFIRM_TIMEOUT seconds
+# after sending counts as failed.
+DEFERRED_CONFIRMATION = True
+CONFIRM_TIMEOUT = 120
+VERIFY_PASSES = 3
+VERIFY_INTERVAL = 30
+# How long an observed number status is trusted (seconds), see validity.py.
+# Known-invalid numbers are skipped without opening their chat.
+VALIDITY_TTL = {"invalid": 30 * 86400, "on_whatsapp": 7 * 86400}
+# Automatic retries per failure reason (failures.FailReason values): attempts
+# in total, first delay in seconds, growth factor, longest delay and +/- jitter
+# fraction. Reasons not listed (invalid_number) are never retried. Contacts
+# still backing off are held back from new runs.
+RETRY_POLICIES = {
+    "open_chat_failed": {"attempts": 4, "backoff": 60, "factor": 2, "max_delay": 1800, "jitter": 0.2},
+    "no_composer": {"attempts": 3, "backoff": 120, "factor": 2, "max_delay": 1800, "jitter": 0.2},
+    "one_or_more_unsent": {"attempts": 3, "backoff": 300, "factor": 3, "max_delay": 7200, "jitter": 0.2},
+    "send_error": {"attempts": 3, "backoff": 60, "factor": 2, "max_delay": 1800, "jitter": 0.2},
+}
+# After the main pass, keep retrying this run's failures as they come due
+# while the next one is at most this many seconds away (0 = leave them all
+# for the next run)
+RETRY_DRAIN_WINDOW = 300
+# A number whose retries ran out is held back from new runs for this many
+# seconds after its last attempt, then forgotten so a later failure starts a
+# fresh policy
+RETRY_FORGET_AFTER = 7 * 86400
+# Per-profile file (inside the profile dir) holding today's chat count
+RATE_STATE_FILE = "rate_state.json"
 
 # Application constants
+# Used to turn national numbers ("0911223344", "911223344") into E.164 keys
+DEFAULT_COUNTRY_CODE = "251"
+NATIONAL_NUMBER_LENGTH = 9
 PRIORITY_KEYWORDS = ["software", "computer", "web", "branding", "marketing", "solution"]
 
 # Initialize empty lists that will be populated by helper.py
+# (PENDING_LIST becomes a pendingq.PendingQueue, iterate it or use helper.get_pending())
 PENDING_LIST = []
-CONTACTED_LIST = []
+CONTACTED_LIST = []  # None while only the phone index is loaded, see helper.contacted_records()
 FAILED_LIST = []
-CONTACTED_NUMBERS = []
+UNCONFIRMED = {}  # phone -> entry sent but not delivery-checked yet, see helper.save_unconfirmed_item()
+CONTACTED_NUMBERS = set()  # phones of CONTACTED_LIST, for O(1) "already contacted" checks
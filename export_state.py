@@ -0,0 +1,39 @@
+"""
+Pretty export of the state files, for reading or diffing by hand.
+
+The live files are written compact (see config.JSON_CODEC / JSON_PRETTY) and
+may have journal tails that aren't folded in yet. This loads the state the same
+way the app does and writes indented copies to a separate directory.
+
+Usage:
+    python export_state.py               # writes ./export/*.json
+    python export_state.py --out DIR     # writes DIR/*.json
+"""
+import os
+import sys
+
+import config
+import codec
+from helper import load_all_state, get_pending, contacted_records, use_sqlite, state_store
+
+
+def export(out_dir):
+    load_all_state()
+    if use_sqlite():
+        contacted = state_store().outcomes("contacted")
+        failed = state_store().failures()
+    else:
+        contacted = contacted_records()
+        failed = config.FAILED_LIST
+    os.makedirs(out_dir, exist_ok=True)
+    for name, data in (("pending.json", get_pending()), ("contacted.json", contacted), ("failed.json", failed)):
+        path = os.path.join(out_dir, name)
+        with open(path, "wb") as f:
+            f.write(codec.dumps(data, pretty=True))
+        print(f"{path}: {len(data)} entries")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    out = args[args.index("--out") + 1] if "--out" in args else os.path.join(config.BASE_DIR, "export")
+    export(out)
@@ -0,0 +1,126 @@
+import hashlib
+from datetime import datetime
+from enum import Enum
+
+from phones import normalize_phone
+
+
+class FailReason(str, Enum):
+    """Why a contact could not be messaged. Values are what ends up in failed.json"""
+    INVALID_NUMBER = "invalid_number"
+    OPEN_CHAT_FAILED = "open_chat_failed"
+    NO_COMPOSER = "no_composer"
+    ONE_OR_MORE_UNSENT = "one_or_more_unsent"
+    SEND_ERROR = "send_error"
+
+    @classmethod
+    def coerce(cls, reason):
+        """
+        Map a reason (enum, code or legacy free text) to (FailReason, error_text).
+        Old failed.json rows stored str(exception) as the reason; those become
+        SEND_ERROR with the text kept as the error.
+        """
+        if isinstance(reason, cls):
+            return reason, None
+        try:
+            return cls(reason), None
+        except ValueError:
+            return cls.SEND_ERROR, (str(reason) if reason else None)
+
+
+def error_digest(error):
+    """Short, stable summary of an exception text: hash + first line"""
+    if not error:
+        return None
+    text = str(error)
+    first_line = text.strip().splitlines()[0] if text.strip() else ""
+    digest = hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()[:10]
+    return f"{digest} {first_line[:80]}".strip()
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class FailureIndex:
+    """
+    Failed outcomes aggregated per (phone, reason).
+
+    Each row counts attempts and keeps first/last timestamps plus the digest of
+    the last error, so retries update a row instead of appending a new one.
+    `entries` is the list that is persisted as failed.json.
+    """
+
+    def __init__(self, rows=()):
+        self.entries = []
+        self._by_key = {}
+        for row in rows:
+            self.add_row(row)
+
+    def add_row(self, row):
+        """Fold in a stored row: an aggregated entry, a journal event or a legacy entry"""
+        reason, error = FailReason.coerce(row.get("reason"))
+        attempts = int(row.get("attempts", 1))
+        at = row.get("lastAt") or row.get("at")
+        entry = self._touch(row.get("businessName"), row.get("phone"), reason, attempts,
+                            row.get("firstAt") or at, at)
+        last_error = row.get("lastError") or error_digest(row.get("error") or error)
+        if last_error:
+            entry["lastError"] = last_error
+        return entry
+
+    def record(self, name, phone, reason, error=None):
+        """Count one new failed attempt, returns (entry, event) where event is what to journal"""
+        reason, legacy_error = FailReason.coerce(reason)
+        at = _now()
+        entry = self._touch(name, phone, reason, 1, at, at)
+        digest = error_digest(error or legacy_error)
+        if digest:
+            entry["lastError"] = digest
+        event = {"businessName": name, "phone": entry["phone"], "reason": reason.value, "at": at}
+        if digest:
+            event["error"] = digest
+        return entry, event
+
+    def _touch(self, name, phone, reason, attempts, first_at, last_at):
+        key = (normalize_phone(phone) or str(phone), reason.value)
+        entry = self._by_key.get(key)
+        if entry is None:
+            entry = {
+                "businessName": name,
+                "phone": key[0],
+                "reason": reason.value,
+                "attempts": attempts,
+                "firstAt": first_at,
+                "lastAt": last_at,
+                # Always present: snapshots serialize these dicts on the writer
+                # thread, so keys must not be added after creation
+                "lastError": None,
+            }
+            self._by_key[key] = entry
+            self.entries.append(entry)
+        else:
+            entry["attempts"] += attempts
+            if last_at and (not entry["lastAt"] or last_at > entry["lastAt"]):
+                entry["lastAt"] = last_at
+            if first_at and (not entry["firstAt"] or first_at < entry["firstAt"]):
+                entry["firstAt"] = first_at
+            if name:
+                entry["businessName"] = name
+        return entry
+
+    def attempts(self, phone, reason=None):
+        key = normalize_phone(phone)
+        if reason is not None:
+            entry = self._by_key.get((key, FailReason.coerce(reason)[0].value))
+            return entry["attempts"] if entry else 0
+        return sum(e["attempts"] for (p, _), e in self._by_key.items() if p == key)
+
+    def reasons(self, phone):
+        key = normalize_phone(phone)
+        return [r for (p, r) in self._by_key if p == key]
+
+
+def aggregate_failures(rows):
+    """Journal fold: raw events and aggregated rows in, aggregated rows out"""
+    return FailureIndex(rows).entries
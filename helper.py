@@ -7,63 +7,480 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import sys
 import config
+import codec
+from journal import Journal
+from writer import PersistenceWriter, write_json_atomic
+from pendingq import PendingQueue
+from campaignlog import CampaignLog
+from numindex import PhoneIndex, phone_to_int
+from scheduler import RateScheduler
+from store import StateStore
+from failures import FailReason, FailureIndex, aggregate_failures, error_digest
+from validity import ValidityCache, INVALID
+from retryq import RetryQueue
+from phones import normalize_phone
 from playwright.async_api import async_playwright
 
 def load_json(filename, default=None):
     if os.path.exists(filename):
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return codec.read_file(filename)
         except Exception:
             return default
     return default
 
 def save_json(filename, data):
+    writer = state_writer()
+    if writer is not None:
+        writer.save(filename, data)
+        return
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        write_json_atomic(filename, data)
     except Exception as e:
         print(f"Failed to save {filename}: {e}")
 
 
+# -------------------------------
+# Background writer
+# -------------------------------
+
+_writer = None
+
+def state_writer():
+    """The shared PersistenceWriter, or None when ASYNC_WRITES is off"""
+    global _writer
+    if _writer is None and config.ASYNC_WRITES:
+        _writer = PersistenceWriter(config.WRITE_QUEUE_SIZE)
+    return _writer
+
+def flush_writes():
+    """Wait until every queued state write is on disk (call before exiting)"""
+    save_caches()
+    if _writer is not None:
+        _writer.flush()
+
+async def wait_for_writer():
+    """Backpressure for the send loop: let a backlogged writer catch up without blocking the event loop"""
+    if _writer is not None and _writer.backlogged():
+        await asyncio.get_running_loop().run_in_executor(None, _writer.flush)
+
+
+# -------------------------------
+# Outcome journals
+# -------------------------------
+
+_journals = {}
+
+def _journal(snapshot_file, journal_file, on_compact=None, fold=None):
+    journal = _journals.get(snapshot_file)
+    if journal is None:
+        journal = Journal(snapshot_file, journal_file, config.JOURNAL_COMPACT_EVERY, state_writer(), on_compact, fold)
+        _journals[snapshot_file] = journal
+    return journal
+
+def contacted_journal():
+    on_compact = _reindex_contacted if use_phone_index() else None
+    return _journal(config.CONTACTED_FILE, config.CONTACTED_JOURNAL_FILE, on_compact)
+
+def failed_journal():
+    # The journal holds one event per attempt, snapshots hold the aggregate
+    return _journal(config.FAILED_FILE, config.FAILED_JOURNAL_FILE, fold=aggregate_failures)
+
+def unconfirmed_journal():
+    # Sends and their delivery checks are journaled, snapshots hold the open ones
+    return _journal(config.UNCONFIRMED_FILE, config.UNCONFIRMED_JOURNAL_FILE, fold=_open_unconfirmed)
+
+def _open_unconfirmed(events):
+    """Latest entry per phone from unconfirmed.jsonl events, minus the resolved ones"""
+    entries = {}
+    for event in events:
+        if event.get("resolved"):
+            entries.pop(event.get("phone"), None)
+        else:
+            entries[event.get("phone")] = event
+    return list(entries.values())
+
+
+# -------------------------------
+# Aggregated failures
+# -------------------------------
+
+_failures = None
+
+def failure_index():
+    """FailureIndex backing config.FAILED_LIST, rebuilt if the list was replaced"""
+    global _failures
+    if _failures is None or _failures.entries is not config.FAILED_LIST:
+        _failures = FailureIndex(config.FAILED_LIST)
+        config.FAILED_LIST = _failures.entries
+    return _failures
+
+def _load_failures(rows):
+    """
+    Aggregate loaded rows in memory only: loading never writes. Legacy
+    one-row-per-attempt files reach disk aggregated with the next failure
+    write (json) or journal compaction, or right away via migrate_phones.py.
+    """
+    global _failures
+    _failures = FailureIndex(rows)
+    config.FAILED_LIST = _failures.entries
+
+
+# -------------------------------
+# Contacted phone index
+# -------------------------------
+
+_contacted_index = None
+
+def use_phone_index():
+    return config.USE_PHONE_INDEX and config.USE_JOURNAL and not use_sqlite()
+
+def contacted_index():
+    global _contacted_index
+    if _contacted_index is None:
+        _contacted_index = PhoneIndex(config.CONTACTED_INDEX_FILE)
+    return _contacted_index
+
+def _reindex_contacted(entries):
+    """Journal compaction hook: contacted.json changed, rebuild its index"""
+    contacted_index().write((phone_to_int(e.get("phone")) for e in entries), config.CONTACTED_FILE)
+
+def contacted_records():
+    """Full contacted entries, loaded on first use when only the index is mapped"""
+    if config.CONTACTED_LIST is None:
+        # Queued journal appends have to be on disk before reading it back
+        flush_writes()
+        config.CONTACTED_LIST = contacted_journal().load()
+    return config.CONTACTED_LIST
+
+
+_campaign_log = None
+
+def campaign_log():
+    """Write-ahead log of the running campaign, used for crash resume"""
+    global _campaign_log
+    if _campaign_log is None:
+        _campaign_log = CampaignLog(
+            config.CAMPAIGN_WAL_FILE, config.CAMPAIGN_CHECKPOINT_FILE, config.CAMPAIGN_CHECKPOINT_EVERY
+        )
+    return _campaign_log
+
+
+_schedulers = {}
+
+def rate_scheduler(profile):
+    """Per-session pacing (token buckets + daily cap) for one browser profile"""
+    scheduler = _schedulers.get(profile)
+    if scheduler is None:
+        scheduler = RateScheduler(
+            config.RATE_PER_MINUTE, config.RATE_PER_HOUR, config.RATE_BURST, config.DAILY_CAP,
+            config.CHAT_JITTER, config.MESSAGE_GAP, os.path.join(profile, config.RATE_STATE_FILE),
+        )
+        _schedulers[profile] = scheduler
+    return scheduler
+
+
+# -------------------------------
+# SQLite state store
+# -------------------------------
+
+_store = None
+_campaign_id = None
+
+def use_sqlite():
+    return config.STATE_BACKEND == "sqlite"
+
+def state_store():
+    global _store
+    if _store is None:
+        _store = StateStore(config.STATE_DB_FILE)
+    return _store
+
+def _store_write(method, *args, **kwargs):
+    """Run a StateStore write on the writer thread when there is one"""
+    writer = state_writer()
+    fn = getattr(state_store(), method)
+    if writer is not None:
+        writer.call(lambda: fn(*args, **kwargs))
+    else:
+        fn(*args, **kwargs)
+
+def _import_json_state(store):
+    """Seed an empty database from the JSON files of the json backend"""
+    if config.USE_JOURNAL:
+        contacted = contacted_journal().load()
+        failed = failed_journal().load()
+    else:
+        contacted = load_json(config.CONTACTED_FILE, [])
+        failed = load_json(config.FAILED_FILE, [])
+    store.set_pending(load_json(config.PENDING_FILE, []))
+    store.add_outcomes(contacted, "contacted")
+    store.add_failures(aggregate_failures(failed))
+
+
 # -------------------------------
 # Load persisted lists
 # -------------------------------
 
 def load_all_state():
     """Load all application state from their respective files"""
-    config.PENDING_LIST = load_json(config.PENDING_FILE, [])
-    config.CONTACTED_LIST = load_json(config.CONTACTED_FILE, [])
-    config.FAILED_LIST = load_json(config.FAILED_FILE, [])
+    # Small and short-lived, kept in its own files for both backends
+    if config.USE_JOURNAL:
+        unconfirmed = _open_unconfirmed(unconfirmed_journal().load())
+    else:
+        unconfirmed = load_json(config.UNCONFIRMED_FILE, [])
+    config.UNCONFIRMED = {e["phone"]: e for e in unconfirmed if e.get("phone")}
+    if use_sqlite():
+        store = state_store()
+        if store.is_empty():
+            _import_json_state(store)
+        config.PENDING_LIST = PendingQueue().load(store.pending())
+        # History stays in the database, use is_contacted() for lookups
+        config.CONTACTED_LIST = []
+        config.FAILED_LIST = []
+        config.CONTACTED_NUMBERS = set()
+        return
+    config.PENDING_LIST = PendingQueue(
+        config.PENDING_FILE, config.PENDING_LOG_FILE, config.PENDING_COMPACT_EVERY, state_writer()
+    ).load()
+    if use_phone_index():
+        journal = contacted_journal()
+        if not contacted_index().open(config.CONTACTED_FILE):
+            _reindex_contacted(journal.read_snapshot())
+        # Only the journal tail is parsed, the snapshot is covered by the index
+        config.CONTACTED_LIST = None
+        config.CONTACTED_NUMBERS = {normalize_phone(e['phone']) for e in journal.load_tail() if 'phone' in e}
+        _load_failures(failed_journal().load())
+        return
+    if config.USE_JOURNAL:
+        config.CONTACTED_LIST = contacted_journal().load()
+        _load_failures(failed_journal().load())
+    else:
+        config.CONTACTED_LIST = load_json(config.CONTACTED_FILE, [])
+        _load_failures(load_json(config.FAILED_FILE, []))
     # Also update CONTACTED_NUMBERS to match CONTACTED_LIST
-    config.CONTACTED_NUMBERS = [contact['phone'] for contact in config.CONTACTED_LIST if 'phone' in contact]
+    config.CONTACTED_NUMBERS = {normalize_phone(contact['phone']) for contact in config.CONTACTED_LIST if 'phone' in contact}
 
 def save_all_state():
     """Save all application state to their respective files"""
-    save_json(config.PENDING_FILE, config.PENDING_LIST)
-    save_json(config.CONTACTED_FILE, config.CONTACTED_LIST)
-    save_json(config.FAILED_FILE, config.FAILED_LIST)
+    if use_sqlite():
+        # Outcomes are written as they happen, only the pending order can be stale
+        _store_write("set_pending", get_pending())
+        return
+    config.PENDING_LIST.reset(get_pending())
+    if config.USE_JOURNAL:
+        contacted_journal().rewrite(contacted_records())
+        failed_journal().rewrite(failure_index().entries)
+    else:
+        save_json(config.CONTACTED_FILE, config.CONTACTED_LIST)
+        save_json(config.FAILED_FILE, config.FAILED_LIST)
 
 def save_contacted_item(name, phone):
     """Save a contacted item to the contacted list and update the numbers cache"""
-    config.CONTACTED_LIST.append({"businessName": name, "phone": phone})
-    if phone not in config.CONTACTED_NUMBERS:
-        config.CONTACTED_NUMBERS.append(phone)
-    save_json(config.CONTACTED_FILE, config.CONTACTED_LIST)
-    config.CONTACTED_NUMBERS.append(phone)
-
-def save_failed_item(name, phone, reason=None):
+    phone = normalize_phone(phone) or phone
+    # Also kept for sqlite, so writes still queued count as contacted
+    config.CONTACTED_NUMBERS.add(phone)
+    if use_sqlite():
+        _store_write("add_outcome", name, phone, "contacted", campaign_id=_campaign_id)
+        return
     entry = {"businessName": name, "phone": phone}
-    if reason:
-        entry["reason"] = reason
-    config.FAILED_LIST.append(entry)
-    save_json(config.FAILED_FILE, config.FAILED_LIST)
+    if config.USE_JOURNAL:
+        contacted_journal().record(config.CONTACTED_LIST, entry)
+    else:
+        config.CONTACTED_LIST.append(entry)
+        save_json(config.CONTACTED_FILE, config.CONTACTED_LIST)
+
+def save_failed_item(name, phone, reason=FailReason.SEND_ERROR, error=None):
+    """Count a failed attempt for (phone, reason), retries update the same row"""
+    phone = normalize_phone(phone) or phone
+    if use_sqlite():
+        reason, legacy_error = FailReason.coerce(reason)
+        _store_write("add_failure", name, phone, reason.value, error_digest(error or legacy_error),
+                     campaign_id=_campaign_id)
+        return
+    entry, event = failure_index().record(name, phone, reason, error)
+    if config.USE_JOURNAL:
+        # Only the event is journaled, compaction folds it into the aggregate
+        failed_journal().record(None, event)
+    else:
+        save_json(config.FAILED_FILE, config.FAILED_LIST)
+
+def save_failed_items(items, reason):
+    """save_failed_item for many (name, phone) pairs with one state write"""
+    items = [(name, normalize_phone(phone) or phone) for name, phone in items]
+    if not items:
+        return
+    if use_sqlite():
+        reason, _ = FailReason.coerce(reason)
+        _store_write("add_failure_many", items, reason.value, campaign_id=_campaign_id)
+        return
+    for name, phone in items:
+        entry, event = failure_index().record(name, phone, reason, None)
+        if config.USE_JOURNAL:
+            failed_journal().record(None, event)
+    if not config.USE_JOURNAL:
+        save_json(config.FAILED_FILE, config.FAILED_LIST)
+
+def save_unconfirmed_item(entry):
+    """Remember a contact whose messages went out but whose ticks weren't checked yet"""
+    config.UNCONFIRMED[entry["phone"]] = entry
+    _persist_unconfirmed(entry)
+
+def resolve_unconfirmed(phone):
+    """The delivery check for `phone` is done (either way)"""
+    phone = normalize_phone(phone) or phone
+    if config.UNCONFIRMED.pop(phone, None) is not None:
+        _persist_unconfirmed({"phone": phone, "resolved": True})
+
+def _persist_unconfirmed(event):
+    if config.USE_JOURNAL:
+        unconfirmed_journal().record(None, event)
+    else:
+        save_json(config.UNCONFIRMED_FILE, list(config.UNCONFIRMED.values()))
+
+def unconfirmed_records(profile=None):
+    """Unconfirmed contacts, only those sent from `profile` when given"""
+    return [e for e in config.UNCONFIRMED.values() if profile is None or e.get("profile") in (None, profile)]
+
+def partition_unconfirmed(businesses):
+    """Split into (sent earlier and waiting for their delivery check, rest)"""
+    waiting, rest = [], []
+    for biz in businesses:
+        (waiting if normalize_phone(biz.get("phone")) in config.UNCONFIRMED else rest).append(biz)
+    return waiting, rest
+
+# -------------------------------
+# Number validity cache
+# -------------------------------
+_validity = None
+# Cache files changed since they were last saved, written once per campaign
+_unsaved = set()
+
+def validity_cache():
+    """ValidityCache of validity.json, seeded with the invalid numbers failed.json already has"""
+    global _validity
+    if _validity is None:
+        _validity = ValidityCache(load_json(config.VALIDITY_FILE, {}), config.VALIDITY_TTL)
+        _validity.prune()
+        _validity.seed_from_failures(state_store().failures() if use_sqlite() else config.FAILED_LIST)
+    return _validity
+
+def record_validity(phone, status):
+    """Remember what opening `phone`'s chat showed (validity.ON_WHATSAPP or INVALID)"""
+    if validity_cache().record(phone, status) is not None:
+        _unsaved.add(config.VALIDITY_FILE)
+
+def save_caches():
+    """Write the cache files changed since the last call (see finish_campaign)"""
+    if config.VALIDITY_FILE in _unsaved:
+        save_json(config.VALIDITY_FILE, validity_cache().entries)
+    if config.RETRY_FILE in _unsaved:
+        save_json(config.RETRY_FILE, retry_queue().entries)
+    _unsaved.clear()
+
+def partition_known_invalid(businesses):
+    """Split into (known invalid, rest) using the validity cache"""
+    cache = validity_cache()
+    invalid, rest = [], []
+    for biz in businesses:
+        (invalid if cache.lookup(biz.get("phone")) == INVALID else rest).append(biz)
+    return invalid, rest
+
+# -------------------------------
+# Retry queue
+# -------------------------------
+_retries = None
+
+def retry_queue():
+    """RetryQueue of retry.json with config.RETRY_POLICIES"""
+    global _retries
+    if _retries is None:
+        _retries = RetryQueue(load_json(config.RETRY_FILE, {}), config.RETRY_POLICIES, config.RETRY_FORGET_AFTER)
+        if _retries.prune():
+            _unsaved.add(config.RETRY_FILE)
+    return _retries
+
+def schedule_retry(name, phone, reason):
+    """Back off `phone` after a failure, returns the retry entry or None if the reason isn't retried"""
+    entry = retry_queue().schedule(name, phone, reason)
+    # Also when None: a non-retryable failure drops the phone's earlier entry
+    _unsaved.add(config.RETRY_FILE)
+    return entry
+
+def resolve_retry(phone):
+    if retry_queue().resolve(phone):
+        _unsaved.add(config.RETRY_FILE)
+
+def partition_retry_waiting(businesses):
+    """Split into (still backing off or recently out of retries, rest)"""
+    queue = retry_queue()
+    waiting, rest = [], []
+    for biz in businesses:
+        (waiting if queue.waiting(biz.get("phone")) else rest).append(biz)
+    return waiting, rest
+
+def get_pending():
+    """Current pending businesses as a plain list"""
+    return config.PENDING_LIST.items()
 
 def remove_from_pending_by_phone(phone):
-    print(f"Removing {phone} from pending list")
-    print(config.PENDING_LIST)
-    config.PENDING_LIST = [b for b in config.PENDING_LIST if str(b["phone"]) != str(phone)]
-    save_json(config.PENDING_FILE, config.PENDING_LIST)
+    """Mark a number as processed, O(1) and logged (see pendingq.PendingQueue)"""
+    if config.PENDING_LIST.remove(phone) and use_sqlite():
+        _store_write("remove_pending", phone)
+
+def remove_many_from_pending(phones):
+    """Remove every business whose phone is in `phones` with a single save"""
+    phones = {normalize_phone(p) for p in phones}
+    if not phones:
+        return
+    config.PENDING_LIST.remove_many(phones)
+    if use_sqlite():
+        _store_write("remove_pending_many", phones)
+
+def set_pending(businesses):
+    """Replace the pending list and persist it"""
+    config.PENDING_LIST.reset(businesses)
+    if use_sqlite():
+        _store_write("set_pending", list(businesses))
+
+def is_contacted(phone):
+    """True if a message was already delivered to this phone"""
+    key = normalize_phone(phone)
+    if key in config.CONTACTED_NUMBERS:
+        return True
+    if use_phone_index():
+        return phone_to_int(key) in contacted_index()
+    return use_sqlite() and state_store().is_contacted(key)
+
+def partition_contacted(businesses):
+    """Split businesses into (already_contacted, to_send), keeping their order"""
+    phones = [normalize_phone(b.get("phone", "")) for b in businesses]
+    if use_sqlite():
+        known = state_store().contacted_among(phones) | config.CONTACTED_NUMBERS
+    elif use_phone_index():
+        by_int = {phone_to_int(p): p for p in phones if p}
+        indexed = contacted_index().contains_many(by_int)
+        known = config.CONTACTED_NUMBERS | {by_int[k] for k in indexed}
+    else:
+        known = config.CONTACTED_NUMBERS
+    already, to_send = [], []
+    for biz, phone in zip(businesses, phones):
+        (already if phone and phone in known else to_send).append(biz)
+    return already, to_send
+
+def start_campaign(template_choice):
+    """Open a campaign row so outcomes can be grouped per run (sqlite only)"""
+    global _campaign_id
+    if use_sqlite():
+        _campaign_id = state_store().start_campaign(template_choice)
+    return _campaign_id
+
+def finish_campaign(result):
+    global _campaign_id
+    save_caches()
+    if use_sqlite() and _campaign_id is not None:
+        _store_write("finish_campaign", _campaign_id, json.dumps(result))
+    _campaign_id = None
 
 async def random_delay(min_ms=1000, max_ms=3000):
     await asyncio.sleep(random.uniform(min_ms/1000, max_ms/1000))
@@ -0,0 +1,189 @@
+import os
+import threading
+
+import codec
+from writer import write_json_atomic
+
+
+class Journal:
+    """
+    Append-only JSONL log that sits next to a JSON snapshot file.
+
+    Every event is written as one line and flushed immediately, so recording an
+    outcome costs a single small write instead of rewriting the whole file.
+    Once `compact_every` events have piled up the snapshot is rewritten in the
+    background and the journal is truncated.
+
+    With a PersistenceWriter all file work runs on the writer thread, in order,
+    so compaction is just "write snapshot, truncate journal". Without one the
+    journal is rotated and the snapshot written by a short-lived thread.
+
+    Callers that don't keep the records in memory pass `items=None`; the
+    compaction then rebuilds the snapshot from the files, passing the rows
+    through `fold(entries)` when given (e.g. to aggregate events per key).
+    `on_compact(entries)` is called after every snapshot write.
+    """
+
+    def __init__(self, snapshot_file, journal_file, compact_every=500, writer=None, on_compact=None, fold=None):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self.rotated_file = journal_file + ".old"
+        self.compact_every = compact_every
+        self.writer = writer
+        self.on_compact = on_compact
+        self.fold = fold
+        self._lock = threading.Lock()
+        self._fh = None
+        self._count = 0
+        self._compactor = None
+
+    # -------------------------------
+    # Loading
+    # -------------------------------
+
+    def load(self):
+        """Return the snapshot entries followed by every journaled event"""
+        items = self.read_snapshot() + self.read_journal()
+        with self._lock:
+            self._count = self._line_count(self.journal_file)
+        return items
+
+    def load_tail(self):
+        """Only the journaled events, for callers that index the snapshot instead of loading it"""
+        entries = self.read_journal()
+        with self._lock:
+            self._count = self._line_count(self.journal_file)
+        return entries
+
+    def read_snapshot(self):
+        if os.path.exists(self.snapshot_file):
+            try:
+                return codec.read_file(self.snapshot_file)
+            except Exception:
+                pass
+        return []
+
+    def read_journal(self):
+        """Events not folded into the snapshot yet"""
+        # A rotated journal only survives when a compaction was interrupted,
+        # its events come before the ones in the live journal.
+        entries = []
+        for path in (self.rotated_file, self.journal_file):
+            entries.extend(self._read_lines(path))
+        return entries
+
+    @staticmethod
+    def _read_lines(path):
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(codec.loads(line))
+                except ValueError:
+                    # Torn last line after a crash, everything before it is fine
+                    continue
+        return entries
+
+    @staticmethod
+    def _line_count(path):
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            return sum(1 for _ in f)
+
+    # -------------------------------
+    # Writing
+    # -------------------------------
+
+    def record(self, items, entry):
+        """Append `entry` to the in-memory `items` list (if any) and to the journal"""
+        line = codec.dumps(entry, pretty=False).decode("utf-8") + "\n"
+        with self._lock:
+            if items is not None:
+                items.append(entry)
+            self._count += 1
+            compact = self._count >= self.compact_every
+            if self.writer is not None:
+                # Queue order matches list order because both happen under the lock
+                self.writer.call(self._append, line)
+                if compact:
+                    self._count = 0
+                    self.writer.call(self._compact_in_place, None if items is None else list(items))
+                return
+            self._append(line)
+            if compact:
+                self._start_compaction(items)
+
+    def _append(self, line):
+        if self._fh is None:
+            self._fh = open(self.journal_file, "a", encoding="utf-8")
+        self._fh.write(line)
+        self._fh.flush()
+
+    def _compact_in_place(self, snapshot):
+        """Writer thread only: every queued append before this one is on disk"""
+        if snapshot is None:
+            snapshot = self._fold(self.read_snapshot() + self.read_journal())
+        write_json_atomic(self.snapshot_file, snapshot)
+        self._close()
+        for path in (self.journal_file, self.rotated_file):
+            if os.path.exists(path):
+                os.remove(path)
+        if self.on_compact is not None:
+            self.on_compact(snapshot)
+
+    def _fold(self, entries):
+        return self.fold(entries) if self.fold is not None else entries
+
+    def _start_compaction(self, items):
+        """Rotate the journal and rewrite the snapshot in the background (lock held)"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        if os.path.exists(self.rotated_file):
+            # Leftover from an interrupted run, fold it in synchronously first
+            leftover = self._fold(self.read_snapshot() + self._read_lines(self.rotated_file))
+            write_json_atomic(self.snapshot_file, leftover)
+            os.remove(self.rotated_file)
+        self._close()
+        os.replace(self.journal_file, self.rotated_file)
+        self._count = 0
+        snapshot = None if items is None else list(items)
+        self._compactor = threading.Thread(target=self._compact, args=(snapshot,), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, snapshot):
+        try:
+            if snapshot is None:
+                snapshot = self._fold(self.read_snapshot() + self._read_lines(self.rotated_file))
+            write_json_atomic(self.snapshot_file, snapshot)
+            # Crashing right here replays the rotated events once more on the
+            # next load, which only duplicates rows that are already known.
+            os.remove(self.rotated_file)
+            if self.on_compact is not None:
+                self.on_compact(snapshot)
+        except Exception as e:
+            print(f"Failed to compact {self.journal_file}: {e}")
+
+    def rewrite(self, items):
+        """Write `items` as the new snapshot and drop the journal"""
+        if self.writer is not None:
+            with self._lock:
+                self._count = 0
+                self.writer.call(self._compact_in_place, list(items))
+            return
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._compact_in_place(list(items))
+            self._count = 0
+
+    def _close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
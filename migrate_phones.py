@@ -0,0 +1,107 @@
+"""
+One-shot migration: rewrite the state files with canonical phone keys.
+
+Older runs stored numbers exactly as pasted ("+251 91 247 4806", "0912474806", ...),
+so the same contact could appear several times under different spellings. This
+rewrites pending/contacted/failed with normalize_phone() keys and collapses the
+duplicates that show up once the keys agree.
+
+Usage:
+    python migrate_phones.py            # rewrite the files
+    python migrate_phones.py --dry-run  # only report what would change
+"""
+import sys
+
+import config
+from helper import (
+    load_all_state, save_all_state, use_sqlite, state_store, set_pending, flush_writes, load_json,
+    contacted_journal, failed_journal
+)
+from pendingq import PendingQueue
+from phones import normalize_phone
+from failures import FailReason, aggregate_failures
+
+
+def _canonicalize(entries, dedupe_key):
+    """Return (migrated_entries, rewritten_count, collapsed_duplicates)"""
+    seen = {}
+    migrated = []
+    rewritten = 0
+    collapsed = []
+    for entry in entries:
+        raw = str(entry.get("phone", ""))
+        key = normalize_phone(raw)
+        if not key:
+            migrated.append(entry)
+            continue
+        if key != raw:
+            rewritten += 1
+        new_entry = dict(entry)
+        new_entry["phone"] = key
+        ident = dedupe_key(new_entry)
+        if ident in seen:
+            collapsed.append((raw, seen[ident]))
+            continue
+        seen[ident] = raw
+        migrated.append(new_entry)
+    return migrated, rewritten, collapsed
+
+
+def _stored_state():
+    """
+    (pending, contacted, failed) rows exactly as stored. Read straight from the
+    files rather than through load_all_state, which already aggregates the
+    failures (hiding the rows this migration collapses) and may build the
+    contacted index.
+    """
+    pending = PendingQueue(config.PENDING_FILE, config.PENDING_LOG_FILE).load().items()
+    if config.USE_JOURNAL:
+        return pending, contacted_journal().load(), failed_journal().load()
+    return pending, load_json(config.CONTACTED_FILE, []), load_json(config.FAILED_FILE, [])
+
+
+def migrate(dry_run=False):
+    if use_sqlite():
+        # Rows keep the raw number for display, only the indexed key changes
+        rekeyed, collapsed = state_store().rekey_phones(dry_run)
+        print(f"{config.STATE_DB_FILE}: {rekeyed} phone key(s) recomputed, "
+              f"{len(collapsed)} duplicate failure row(s) collapsed")
+        for raw, kept in collapsed:
+            print(f"    {raw!r} duplicates {kept!r}")
+        print("Dry run, nothing written." if dry_run else "Database rewritten.")
+        return
+
+    pending, contacted, failed = _stored_state()
+    report = {}
+    by_phone = lambda e: e["phone"]
+    results = {}
+    for label, attr, before in (("pending", "PENDING_LIST", pending), ("contacted", "CONTACTED_LIST", contacted)):
+        migrated, rewritten, collapsed = _canonicalize(before, by_phone)
+        results[attr] = migrated
+        report[label] = (len(before), len(migrated), rewritten, collapsed)
+    # Failures are re-aggregated under the new keys, so merged rows keep their attempt counts
+    by_phone_reason = lambda e: (e["phone"], FailReason.coerce(e.get("reason"))[0].value)
+    _, rewritten, collapsed = _canonicalize(failed, by_phone_reason)
+    results["FAILED_LIST"] = aggregate_failures(failed)
+    report["failed"] = (len(failed), len(results["FAILED_LIST"]), rewritten, collapsed)
+
+    for label, (before, after, rewritten, collapsed) in report.items():
+        print(f"{label}: {before} -> {after} entries, {rewritten} number(s) rewritten, "
+              f"{len(collapsed)} duplicate(s) collapsed")
+        for raw, kept in collapsed:
+            print(f"    {raw!r} duplicates {kept!r}")
+
+    if dry_run:
+        print("Dry run, nothing written.")
+        return
+    load_all_state()
+    set_pending(results["PENDING_LIST"])
+    config.CONTACTED_LIST = results["CONTACTED_LIST"]
+    config.FAILED_LIST = results["FAILED_LIST"]
+    save_all_state()
+    flush_writes()
+    print("State files rewritten.")
+
+
+if __name__ == "__main__":
+    migrate(dry_run="--dry-run" in sys.argv[1:])
@@ -0,0 +1,145 @@
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+
+try:
+    import numpy
+except ImportError:  # optional, only speeds up bulk lookups
+    numpy = None
+
+from phones import normalize_phone
+
+
+MAGIC = b"WAIX"
+VERSION = 1
+# magic, version, count, snapshot mtime (ns), snapshot size
+HEADER = struct.Struct("<4sIQqq")
+
+
+def phone_to_int(phone):
+    """int64 form of the canonical phone key, None when there is no number"""
+    key = normalize_phone(phone)
+    return int(key[1:]) if key else None
+
+
+def _snapshot_stamp(snapshot_file):
+    try:
+        st = os.stat(snapshot_file)
+    except OSError:
+        return 0, -1
+    return st.st_mtime_ns, st.st_size
+
+
+class PhoneIndex:
+    """
+    Sorted int64 phone keys in a memory-mapped file.
+
+    The index describes one version of the snapshot file (its mtime and size
+    are stored in the header), so opening it at startup is just an mmap and a
+    header check instead of parsing the whole JSON. Numbers recorded since that
+    snapshot live in the journal, which callers keep as a small in-memory set.
+    Membership is a binary search over the mapped array (NumPy's searchsorted
+    for bulk lookups when NumPy is installed).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = None
+        self._mm = None
+        self._view = None
+        # Slot range of the keys inside the int64 view (the header is 4 slots)
+        self._lo = self._hi = 0
+
+    def open(self, snapshot_file):
+        """Map the index. Returns False if it is missing or stale for `snapshot_file`"""
+        with self._lock:
+            self._close()
+            if not os.path.exists(self.path):
+                return False
+            fh = open(self.path, "rb")
+            try:
+                header = fh.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    fh.close()
+                    return False
+                magic, version, count, mtime_ns, size = HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION or (mtime_ns, size) != _snapshot_stamp(snapshot_file):
+                    fh.close()
+                    return False
+                self._fh = fh
+                if count:
+                    self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._view = memoryview(self._mm).cast("q")
+                    self._lo = HEADER.size // 8
+                    self._hi = self._lo + count
+                return True
+            except Exception:
+                fh.close()
+                self._close()
+                return False
+
+    def write(self, keys, snapshot_file):
+        """Replace the index with `keys` (ints, any order) describing `snapshot_file`"""
+        ordered = sorted(set(keys))
+        mtime_ns, size = _snapshot_stamp(snapshot_file)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(ordered), mtime_ns, size))
+            f.write(struct.pack(f"<{len(ordered)}q", *ordered))
+        with self._lock:
+            # A mapped file can't be replaced on Windows, unmap first
+            self._close()
+            os.replace(tmp, self.path)
+        self.open(snapshot_file)
+
+    def __contains__(self, phone_int):
+        if phone_int is None:
+            return False
+        with self._lock:
+            if self._view is None:
+                return False
+            i = bisect_left(self._view, phone_int, self._lo, self._hi)
+            return i < self._hi and self._view[i] == phone_int
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def contains_many(self, phone_ints):
+        """Subset of `phone_ints` present in the index"""
+        phone_ints = [k for k in phone_ints if k is not None]
+        with self._lock:
+            if self._view is None or not phone_ints:
+                return set()
+            if numpy is not None:
+                arr = numpy.frombuffer(self._mm, dtype="<i8", count=len(self), offset=HEADER.size)
+                wanted = numpy.asarray(phone_ints, dtype="<i8")
+                pos = numpy.searchsorted(arr, wanted)
+                pos[pos >= len(arr)] = len(arr) - 1
+                found = set(wanted[arr[pos] == wanted].tolist())
+                del arr  # drop the buffer export before the map can be closed
+                return found
+            found = set()
+            for k in phone_ints:
+                i = bisect_left(self._view, k, self._lo, self._hi)
+                if i < self._hi and self._view[i] == k:
+                    found.add(k)
+            return found
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._lo = self._hi = 0
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
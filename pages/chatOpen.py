@@ -0,0 +1,185 @@
+import asyncio
+import re
+
+import config
+from phones import wa_number
+
+
+COMPOSER_SELECTOR = 'footer div[contenteditable="true"]'
+ALERT_SELECTOR = "div[role='alert']"
+NEW_CHAT_SELECTOR = 'span[data-icon="new-chat-outline"]'
+NEW_CHAT_SEARCH_SELECTOR = 'div[contenteditable="true"][data-tab="3"]'
+INVALID_MARKERS = ("invalid", "not on whatsapp", "phone number shared via url is invalid")
+INVALID_ALERT_TEXT = re.compile("|".join(re.escape(m) for m in INVALID_MARKERS), re.IGNORECASE)
+
+# Outcomes of opening a chat
+CHAT_READY = "ready"            # detail: the composer element
+CHAT_INVALID = "invalid"        # detail: the alert text
+CHAT_NAV_FAILED = "nav_failed"  # detail: the error
+CHAT_TIMEOUT = "timeout"        # neither composer nor invalid alert showed up
+
+
+def chat_url(phone):
+    return f"{config.WHATSAPP_URL}/send?phone={wa_number(phone)}"
+
+
+# -------------------------------
+# Ways to get to a chat
+# -------------------------------
+# The in-app strategies keep the loaded WhatsApp Web app instead of booting it
+# again for every number. They only trigger the switch; open_chat checks that
+# the chat really changed and otherwise falls back to a full goto.
+
+async def _via_goto(page, phone, timeout):
+    """Full navigation, only waiting for the response to commit"""
+    await page.goto(chat_url(phone), wait_until="commit", timeout=timeout)
+
+
+_ROUTE_JS = """url => {
+    history.pushState({}, "", url);
+    window.dispatchEvent(new PopStateEvent("popstate", {state: {}}));
+}"""
+
+
+async def _via_route(page, phone, timeout):
+    """Client-side routing: push the send URL and let the app's router react"""
+    await page.evaluate(_ROUTE_JS, chat_url(phone))
+
+
+_LINK_JS = """url => {
+    const a = document.createElement("a");
+    a.href = url;
+    a.style.display = "none";
+    document.body.appendChild(a);
+    a.click();
+    a.remove();
+}"""
+
+
+async def _via_link(page, phone, timeout):
+    """Injected deep link, clicked so the app's own link handler opens the chat"""
+    await page.evaluate(_LINK_JS, chat_url(phone))
+
+
+async def _via_search(page, phone, timeout):
+    """New chat → search the number → open the first result"""
+    await page.click(NEW_CHAT_SELECTOR, timeout=timeout)
+    search = await page.wait_for_selector(NEW_CHAT_SEARCH_SELECTOR, timeout=timeout)
+    await search.fill("")
+    await page.keyboard.insert_text(f"+{wa_number(phone)}")
+    await page.keyboard.press("Enter")
+
+
+STRATEGIES = {
+    "goto": _via_goto,
+    "route": _via_route,
+    "link": _via_link,
+    "search": _via_search,
+}
+
+# In-app strategies that kept missing are skipped for the rest of the run
+MAX_STRATEGY_MISSES = 3
+_misses = {}
+
+
+def reset_strategy_misses():
+    """Give every strategy a fresh start, called when a campaign begins"""
+    _misses.clear()
+
+
+# Resolves once the previous chat's composer is detached or an alert shows up
+_SWITCH_JS = f"""el => !el.isConnected || !!document.querySelector("{ALERT_SELECTOR}")"""
+
+
+async def _chat_switched(page, old_composer, timeout):
+    """True once the composer of the previous chat is gone (or there was none)"""
+    if old_composer is None:
+        return True
+    try:
+        await page.wait_for_function(_SWITCH_JS, arg=old_composer, timeout=timeout)
+        return not await old_composer.evaluate("el => el.isConnected")
+    except Exception:
+        return False
+
+
+async def open_chat(page, phone, strategy=None, nav_timeout=30_000, detect_timeout=15_000):
+    """
+    Open the chat of `phone` and return (outcome, detail).
+
+    `strategy` (default config.CHAT_OPEN_STRATEGY) is one of STRATEGIES. An
+    in-app strategy that raises, doesn't switch the chat within
+    config.CHAT_SWITCH_TIMEOUT ms or ends inconclusive falls back to "goto".
+    """
+    strategy = strategy or config.CHAT_OPEN_STRATEGY
+    in_app = strategy != "goto" and _misses.get(strategy, 0) < MAX_STRATEGY_MISSES
+    # A leftover alert (e.g. the previous number was invalid) only goes away
+    # with a reload
+    if in_app and await page.query_selector(ALERT_SELECTOR) is None:
+        outcome = await _open_in_app(page, phone, strategy, detect_timeout)
+        if outcome is not None:
+            _misses[strategy] = 0
+            return outcome
+        _misses[strategy] = _misses.get(strategy, 0) + 1
+    try:
+        await _via_goto(page, phone, nav_timeout)
+    except Exception as e:
+        return CHAT_NAV_FAILED, e
+    return await detect_chat_outcome(page, detect_timeout)
+
+
+async def _open_in_app(page, phone, strategy, detect_timeout):
+    """(outcome, detail) of an in-app strategy, or None when it should fall back"""
+    try:
+        old_composer = await page.query_selector(COMPOSER_SELECTOR)
+        await STRATEGIES[strategy](page, phone, config.CHAT_SWITCH_TIMEOUT)
+        if not await _chat_switched(page, old_composer, config.CHAT_SWITCH_TIMEOUT):
+            # An invalid number leaves the old chat in place and shows the alert
+            outcome, detail = await detect_chat_outcome(page, config.CHAT_SWITCH_TIMEOUT, composer=False)
+            return (outcome, detail) if outcome == CHAT_INVALID else None
+    except Exception:
+        return None
+    outcome, detail = await detect_chat_outcome(page, detect_timeout)
+    return (outcome, detail) if outcome in (CHAT_READY, CHAT_INVALID) else None
+
+
+def _invalid_alert(page):
+    """Alert nodes saying the number is invalid, other alerts (e.g. "Starting chat") don't match"""
+    return page.locator(ALERT_SELECTOR).filter(has_text=INVALID_ALERT_TEXT).first
+
+
+async def detect_chat_outcome(page, timeout=15_000, composer=True):
+    """
+    Race the composer, the invalid-number alert and a page crash, resolving on
+    the first conclusive one. Only alerts whose text has one of
+    INVALID_MARKERS count, so an unrelated alert showing up first (e.g.
+    "Starting chat") doesn't use up the wait for the invalid one.
+
+    Must be called after the navigation committed (or the chat switched),
+    otherwise the composer of the previously open chat would win. With
+    `composer=False` only the alert and a crash are watched.
+    """
+    alert = asyncio.ensure_future(_invalid_alert(page).wait_for(timeout=timeout))
+    crash = asyncio.ensure_future(page.wait_for_event("crash", timeout=timeout))
+    pending = {alert, crash}
+    if composer:
+        composer = asyncio.ensure_future(page.wait_for_selector(COMPOSER_SELECTOR, timeout=timeout))
+        pending.add(composer)
+    try:
+        while pending & {composer, alert}:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if composer in done and composer.exception() is None:
+                return CHAT_READY, composer.result()
+            if crash in done and crash.exception() is None:
+                return CHAT_NAV_FAILED, RuntimeError("page crashed")
+            if alert in done and alert.exception() is None:
+                try:
+                    text = (await _invalid_alert(page).inner_text(timeout=1_000)).strip()
+                except Exception:
+                    text = ""
+                return CHAT_INVALID, text
+        return CHAT_TIMEOUT, None
+    finally:
+        for task in pending:
+            task.cancel()
+        # Swallow the cancellations/timeouts of the losers
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,193 @@
+"""
+Deferred delivery confirmation.
+
+The sender types the messages, records the contact as "sent, unconfirmed" and
+moves on. This stage revisits those chats later in one batch, reads the tick
+icons of the outgoing bubbles and upgrades each contact to contacted (every
+message has at least one tick) or failed (a message is still pending after
+config.CONFIRM_TIMEOUT seconds, or never showed up in the opened chat).
+
+Parsing is plain HTML parsing of the chat pane, so it can be checked offline
+against a saved DOM capture:
+    python -m pages.deliveryVerifier task.html
+"""
+import asyncio
+import sys
+import time
+from html.parser import HTMLParser
+
+import config
+from failures import FailReason
+from campaignlog import CONFIRMED, FAILED
+from scheduler import DailyCapReached
+from .chatOpen import open_chat, CHAT_READY
+
+# Bubble statuses, from the data-icon of the tick next to the time
+PENDING = "pending"
+SENT = "sent"
+DELIVERED = "delivered"
+READ = "read"
+CONFIRMED_STATUSES = (SENT, DELIVERED, READ)
+
+ICON_STATUS = {
+    "msg-time": PENDING,
+    "msg-check": SENT,
+    "msg-dblcheck": DELIVERED,
+}
+
+
+class _ChatParser(HTMLParser):
+    """
+    Collects bubbles from a chat pane: each copyable-text node with a
+    data-pre-plain-text header starts one, its selectable-text span is the
+    text, and the next tick icon is its status. Incoming bubbles have no tick.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bubbles = []
+        self._depth = 0
+        self._text_depth = None
+
+    def handle_starttag(self, tag, attrs):
+        self._depth += 1
+        attrs = dict(attrs)
+        if "data-pre-plain-text" in attrs:
+            self.bubbles.append({"meta": attrs["data-pre-plain-text"].strip(), "text": "", "status": None})
+        elif self._text_depth is None and "selectable-text" in (attrs.get("class") or "").split() and self.bubbles:
+            self._text_depth = self._depth
+        icon = attrs.get("data-icon")
+        if icon in ICON_STATUS and self.bubbles and self.bubbles[-1]["status"] is None:
+            status = ICON_STATUS[icon]
+            if status == DELIVERED and (attrs.get("aria-label") or "").strip().lower() == "read":
+                status = READ
+            self.bubbles[-1]["status"] = status
+
+    def handle_endtag(self, tag):
+        if self._text_depth is not None and self._depth == self._text_depth:
+            self._text_depth = None
+        self._depth -= 1
+
+    def handle_data(self, data):
+        if self._text_depth is not None:
+            self.bubbles[-1]["text"] += data
+
+
+def parse_bubbles(html):
+    """[{"meta", "text", "status"}] for every bubble in `html`, in page order"""
+    parser = _ChatParser()
+    parser.feed(html)
+    parser.close()
+    for bubble in parser.bubbles:
+        bubble["text"] = " ".join(bubble["text"].split())
+    return parser.bubbles
+
+
+def outgoing_statuses(html, messages):
+    """
+    Status of each of `messages` in the chat: the last outgoing bubble with the
+    same text wins. None for a message that isn't in the chat at all.
+    """
+    latest = {}
+    for bubble in parse_bubbles(html):
+        if bubble["status"] is not None:
+            latest[bubble["text"]] = bubble["status"]
+    return [latest.get(" ".join(msg.split())) for msg in messages]
+
+
+def verdict(statuses, sent_at, now=None, timeout=None):
+    """CONFIRMED, FAILED or None (still pending, look again later)"""
+    if statuses and all(s in CONFIRMED_STATUSES for s in statuses):
+        return CONFIRMED
+    now = time.time() if now is None else now
+    timeout = config.CONFIRM_TIMEOUT if timeout is None else timeout
+    if now - sent_at < timeout:
+        return None
+    return FAILED
+
+
+# -------------------------------
+# Live verification
+# -------------------------------
+
+_PANE_JS = "() => (document.querySelector('#main') || document.body).outerHTML"
+
+
+async def chat_statuses(page, phone, messages):
+    """Open the chat of `phone` and read the ticks of `messages`, None if the chat didn't open"""
+    outcome, _ = await open_chat(page, phone)
+    if outcome != CHAT_READY:
+        return None
+    return outgoing_statuses(await page.evaluate(_PANE_JS), messages)
+
+
+async def verify_unconfirmed(page, entries, log_cb, status_cb, sink, pacer):
+    """
+    Revisit `entries` ({"businessName", "phone", "messages", "sentAt"}) until
+    each is confirmed or failed, at most config.VERIFY_PASSES passes apart by
+    config.VERIFY_INTERVAL seconds. Every revisit is a chat open paced by the
+    session's `pacer`; once its daily cap is hit the rest is left for later.
+    A chat that doesn't open stays undecided, only a chat showing the
+    messages missing or unsent fails. Returns the entries still undecided,
+    they stay in the unconfirmed list for the next run.
+    """
+    remaining = list(entries)
+    for attempt in range(config.VERIFY_PASSES):
+        if not remaining:
+            break
+        if attempt:
+            await asyncio.sleep(config.VERIFY_INTERVAL)
+        log_cb(f"🔎 Verifying delivery of {len(remaining)} chat(s)…")
+        undecided = []
+        for i, entry in enumerate(remaining):
+            name, phone = entry.get("businessName"), entry["phone"]
+            try:
+                await pacer.wait_turn()
+            except DailyCapReached as e:
+                log_cb(f"🛑 {e}, {len(remaining) - i} delivery check(s) left for the next run")
+                return undecided + remaining[i:]
+            statuses = await chat_statuses(page, phone, entry["messages"])
+            if statuses is None:
+                undecided.append(entry)
+                continue
+            decision = verdict(statuses, entry.get("sentAt", 0))
+            if decision == CONFIRMED:
+                log_cb(f"🟢 Delivery confirmed for {name} ({phone})")
+                status_cb(phone, "Sent", "sent")
+                sink.count("contacted")
+                sink.delivered(name, phone)
+                sink.mark(phone, CONFIRMED)
+            elif decision == FAILED:
+                log_cb(f"❌ Not all messages delivered to {name} ({phone})")
+                status_cb(phone, "Failed", "invalid")
+                sink.count("failed")
+                sink.undelivered(name, phone, FailReason.ONE_OR_MORE_UNSENT)
+                sink.mark(phone, FAILED)
+            else:
+                undecided.append(entry)
+        remaining = undecided
+    return remaining
+
+
+class DeferredBatch:
+    """Contacts one session sent during this run whose delivery is still to be checked"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.entries = []
+
+    def add(self, name, phone, messages):
+        entry = {"businessName": name, "phone": phone, "messages": list(messages),
+                 "sentAt": time.time(), "profile": self.profile}
+        self.entries.append(entry)
+        return entry
+
+
+# -------------------------------
+# Offline check against a DOM capture
+# -------------------------------
+
+if __name__ == "__main__":
+    with open(sys.argv[1] if len(sys.argv) > 1 else "task.html", "r", encoding="utf-8") as f:
+        for bubble in parse_bubbles(f.read()):
+            print(f"{bubble['meta']:<32} {bubble['status'] or 'incoming':<10} {bubble['text']!r}")
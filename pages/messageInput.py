@@ -0,0 +1,73 @@
+import random
+
+
+# -------------------------------
+# Message entry strategies
+# -------------------------------
+# Each one puts `msg` into the chat composer without pressing Enter.
+
+async def type_human(page, composer, msg):
+    """One key event per character, ~50 ms apart (the original behaviour)"""
+    await composer.type(msg, delay=random.randint(50, 55))
+
+
+async def insert_text(page, composer, msg):
+    """Whole message as a single `insertText`, like an IME commit"""
+    await composer.focus()
+    await page.keyboard.insert_text(msg)
+
+
+# Synthetic paste: no OS clipboard (so no permission prompt and nothing
+# overwritten), the editor receives a normal paste event with the text.
+_PASTE_JS = """(el, text) => {
+    el.focus();
+    const data = new DataTransfer();
+    data.setData("text/plain", text);
+    el.dispatchEvent(new ClipboardEvent("paste", {clipboardData: data, bubbles: true, cancelable: true}));
+}"""
+
+
+async def paste_clipboard(page, composer, msg):
+    """Message delivered as one clipboard paste"""
+    await composer.evaluate(_PASTE_JS, msg)
+
+
+# The editor handles `beforeinput` itself; if nothing cancelled the event the
+# browser's own insertText runs instead, so the text lands either way.
+_INPUT_EVENT_JS = """(el, text) => {
+    el.focus();
+    const ev = new InputEvent("beforeinput", {inputType: "insertText", data: text, bubbles: true, cancelable: true});
+    if (el.dispatchEvent(ev)) {
+        document.execCommand("insertText", false, text);
+    }
+}"""
+
+
+async def input_event(page, composer, msg):
+    """Message injected as a single InputEvent in one round-trip"""
+    await composer.evaluate(_INPUT_EVENT_JS, msg)
+
+
+INPUT_MODES = {
+    "human": type_human,
+    "insert_text": insert_text,
+    "paste": paste_clipboard,
+    "input_event": input_event,
+}
+
+
+async def enter_message(page, composer, msg, mode="human"):
+    """
+    Put `msg` into the composer with the chosen strategy. The fast modes fall
+    back to human typing when the composer is still empty afterwards, e.g.
+    when WhatsApp's editor ignored the synthetic event.
+    """
+    strategy = INPUT_MODES.get(mode, type_human)
+    await strategy(page, composer, msg)
+    if strategy is not type_human:
+        try:
+            landed = (await composer.inner_text()).strip()
+        except Exception:
+            landed = "?"
+        if not landed:
+            await type_human(page, composer, msg)
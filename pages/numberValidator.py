@@ -0,0 +1,112 @@
+import asyncio
+
+import config
+from helper import validity_cache
+from campaignlog import FAILED
+from failures import FailReason
+from validity import ON_WHATSAPP, INVALID
+from phones import normalize_phone
+from scheduler import jitter, DailyCapReached
+from .chatOpen import open_chat, CHAT_READY, CHAT_INVALID
+
+# Classes of a number after opening its chat: validity.ON_WHATSAPP,
+# validity.INVALID, or this one (not cached, the next run tries again)
+OPEN_FAILED = "open_failed"
+
+
+async def classify(page, phone):
+    """Open the chat of `phone` without typing anything and say what it is"""
+    outcome, _ = await open_chat(page, phone)
+    if outcome == CHAT_READY:
+        return ON_WHATSAPP
+    if outcome == CHAT_INVALID:
+        return INVALID
+    return OPEN_FAILED
+
+
+async def classify_all(browser, first_page, phones, tabs, status_cb, pacer):
+    """
+    Classify `phones` from `tabs` tabs of the logged-in context sharing one
+    queue, with config.VALIDATE_GAP between the chats each tab opens.
+    Every open is a chat open for WhatsApp too, so each one waits for the
+    session's `pacer` and counts against its daily cap; once the cap is hit
+    the remaining numbers are left unchecked. Returns {phone: class}.
+    """
+    queue = asyncio.Queue()
+    for phone in phones:
+        queue.put_nowait(phone)
+    classes = {}
+    cap_hit = []
+
+    async def worker(tab):
+        page = first_page if tab == 1 else await browser.new_page()
+        try:
+            while not queue.empty() and not cap_hit:
+                phone = queue.get_nowait()
+                status_cb(phone, "Waiting for send slot…", "working")
+                try:
+                    await pacer.wait_turn()
+                except DailyCapReached as e:
+                    cap_hit.append(e)
+                    status_cb(phone, "Not checked", "skipped")
+                    break
+                status_cb(phone, "Checking number…", "working")
+                try:
+                    classes[phone] = await classify(page, phone)
+                except Exception:
+                    classes[phone] = OPEN_FAILED
+                await asyncio.sleep(jitter(config.VALIDATE_GAP))
+        finally:
+            if page is not first_page:
+                await page.close()
+
+    await asyncio.gather(*(worker(i) for i in range(1, min(tabs, len(phones)) + 1)))
+    return classes
+
+
+async def prevalidate(browser, page, businesses, log_cb, status_cb, sink, pacer, tabs=None):
+    """
+    Validation stage before sending: classify every number of the batch, drop
+    the invalid ones from pending in one bulk update and hand back only the
+    businesses whose chat opened. Numbers whose chat failed to open are left
+    pending for a later run, numbers the daily cap left unchecked are handed
+    back as they are (the send stage stops at the same cap).
+    """
+    tabs = config.VALIDATE_TABS if tabs is None else tabs
+    cache = validity_cache()
+    by_phone = {}
+    for biz in businesses:
+        phone = normalize_phone(biz.get("phone"))
+        # Numbers recently seen on WhatsApp don't need another look
+        if phone and not sink.is_contacted(phone) and cache.peek(phone) != ON_WHATSAPP:
+            by_phone.setdefault(phone, biz)
+    if not by_phone:
+        return list(businesses)
+
+    log_cb(f"🔎 Checking {len(by_phone)} number(s) before sending…")
+    classes = await classify_all(browser, page, list(by_phone), tabs, status_cb, pacer)
+    if len(classes) < len(by_phone):
+        log_cb(f"🛑 Daily cap reached, {len(by_phone) - len(classes)} number(s) not checked")
+
+    for phone, c in classes.items():
+        if c != OPEN_FAILED:
+            sink.observed(phone, c)
+    invalid = [phone for phone, c in classes.items() if c == INVALID]
+    unreachable = [phone for phone, c in classes.items() if c == OPEN_FAILED]
+    if invalid:
+        sink.rejected([(by_phone[phone]["businessName"], phone) for phone in invalid], FailReason.INVALID_NUMBER)
+    for phone in invalid:
+        sink.count("notfound")
+        sink.mark(phone, FAILED)
+    for phone in unreachable:
+        sink.failed(by_phone[phone]["businessName"], phone, FailReason.OPEN_CHAT_FAILED)
+        sink.count("failed")
+        sink.mark(phone, FAILED)
+    for phones, text in ((invalid, "Invalid"), (unreachable, "Failed to open")):
+        for phone in phones:
+            status_cb(phone, text, "invalid")
+
+    log_cb(f"🔎 {len(classes) - len(invalid) - len(unreachable)} on WhatsApp, {len(invalid)} invalid, "
+           f"{len(unreachable)} failed to open")
+    dropped = set(invalid) | set(unreachable)
+    return [biz for biz in businesses if normalize_phone(biz.get("phone")) not in dropped]
@@ -4,12 +4,13 @@ from tkinter import ttk, messagebox, scrolledtext
 import json
 import config  # Import the config module
 from playwright.async_api import async_playwright
+from phones import normalize_phone
 
 # Import from helper for functions
 from helper import (
     load_json, save_json, save_all_state, save_contacted_item,
     save_failed_item, remove_from_pending_by_phone, random_delay,
-    is_priority_business
+    is_priority_business, set_pending, get_pending
 )
 
 class Page1(tk.Frame):
@@ -75,7 +76,7 @@ class Page1(tk.Frame):
         # If there's pending saved data, prefill the box for convenience
         if config.PENDING_LIST:
             try:
-                pretty = json.dumps(config.PENDING_LIST, indent=2, ensure_ascii=False)
+                pretty = json.dumps(get_pending(), indent=2, ensure_ascii=False)
                 self.textbox.insert("1.0", pretty)
             except Exception:
                 pass
@@ -155,6 +156,7 @@ class Page1(tk.Frame):
             # ensure keys exist
             b.setdefault("businessName", b.get("businessName", "Unknown"))
             b.setdefault("phone", str(b.get("phone", "")).strip())
+            b["phone"] = normalize_phone(b["phone"]) or str(b["phone"]).strip()
 
         # Sort: priority businesses first (keep them at top), stable sort by name after that
         def priority_sort(b):
@@ -164,8 +166,7 @@ class Page1(tk.Frame):
         businesses.sort(key=priority_sort)
 
         # Save to pending and update master
-        config.PENDING_LIST = businesses
-        save_json(config.PENDING_FILE, config.PENDING_LIST)
+        set_pending(businesses)
 
         # now show the clean page instead of directly template page
         self.master.show_clean_page(businesses)
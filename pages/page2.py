@@ -13,7 +13,7 @@ from playwright.async_api import async_playwright
 from helper import (
     load_json, save_json, save_all_state, save_contacted_item,
     save_failed_item, remove_from_pending_by_phone, random_delay,
-    is_priority_business
+    is_priority_business, campaign_log
 )
 
 # Local imports (uncomment when needed)
@@ -21,6 +21,7 @@ from helper import (
 # from pageTemplate import PageTemplate
 # from whatsapp import WhatsAppApp
 from .sendMessage import send_messages
+from phones import normalize_phone
 
 from datetime import datetime
 
@@ -48,7 +49,11 @@ class Page2(tk.Frame):
             style='Header.TLabel'
         )
         title.pack(side='left', padx=10)
-        
+
+        # Background WhatsApp login (see WhatsAppApp.prewarm_browser)
+        ttk.Label(header, textvariable=master.login_status,
+                  style='Subtitle.TLabel').pack(side='left', padx=10)
+
         # Action buttons on the right
         btn_container = ttk.Frame(header)
         btn_container.pack(side='right', padx=10)
@@ -73,6 +78,16 @@ class Page2(tk.Frame):
         )
         self.contact_btn.pack(side='right', padx=5)
 
+        # Resume an interrupted campaign from its write-ahead log
+        self.resume_btn = ttk.Button(
+            btn_container,
+            text="⟲ Resume",
+            command=self.resume_contacting,
+            style='Secondary.TButton',
+            width=10
+        )
+        self.resume_btn.pack(side='right', padx=5)
+
         # Main content area
         content = ttk.Frame(self, style='Card.TFrame')
         content.pack(fill='both', expand=True, padx=20, pady=(0, 15))
@@ -409,12 +424,13 @@ class Page2(tk.Frame):
         display_text = f"{emoji} {status_text}"
         
         # Find and update matching rows
+        key = normalize_phone(phone)
         updated = 0
         for iid in self.tree.get_children():
             vals = list(self.tree.item(iid, "values"))
             if len(vals) >= 3:  # Ensure we have enough columns
-                row_phone = str(vals[2])
-                if row_phone == str(phone):
+                row_phone = normalize_phone(vals[2])
+                if row_phone == key:
                     # Preserve existing values except status
                     if len(vals) >= 4:
                         vals[-1] = display_text
@@ -433,12 +449,38 @@ class Page2(tk.Frame):
             if self.tree.selection():
                 self.tree.see(self.tree.selection()[-1])
 
+    def set_rows_status(self, phones, status_text, tag):
+        """Update the status of every row whose phone is in `phones` in one UI call"""
+        self.after(0, self._apply_rows_status, {normalize_phone(p) for p in phones}, status_text, tag)
+
+    def _apply_rows_status(self, phones, status_text, tag):
+        """Apply one status to many rows with a single pass over the table"""
+        status_map = {
+            'sent': '✅',
+            'skipped': '⚠️',
+            'invalid': '❌',
+            'pending': '⏳',
+            'working': '🔄'
+        }
+        display_text = f"{status_map.get(tag, 'ℹ️')} {status_text}"
+
+        updated = 0
+        for iid in self.tree.get_children():
+            vals = list(self.tree.item(iid, "values"))
+            if len(vals) >= 4 and normalize_phone(vals[2]) in phones:
+                vals[-1] = display_text
+                self.tree.item(iid, values=vals, tags=(tag,))
+                updated += 1
+
+        if updated > 0:
+            self._update_stats()
+
     def toggle_controls(self, enabled):
         """Enable or disable UI controls"""
         state = "normal" if enabled else "disabled"
         
         # Update button states
-        for btn in [self.back_btn, self.contact_btn, self.delete_btn]:
+        for btn in [self.back_btn, self.contact_btn, self.delete_btn, self.resume_btn]:
             btn.config(state=state)
         
         # Update cursor
@@ -452,28 +494,56 @@ class Page2(tk.Frame):
         else:
             self.status_var.set("Ready")
 
-    def start_contacting(self):
-        if not self.master.businesses:
+    def start_contacting(self, resume=False):
+        if not resume and not self.master.businesses:
             messagebox.showwarning("No contacts", "No contacts to contact. Please add/paste them first.")
             return
         self.toggle_controls(False)
-        self.safe_log("▶ Starting sending process...")
-        threading.Thread(target=self._thread_entry, daemon=True).start()
+        self.safe_log("▶ Resuming last campaign..." if resume else "▶ Starting sending process...")
+        if self.master.sender is not None:
+            job = self.master.sender.submit(self.async_main(resume))
+            job.add_done_callback(self._job_done)
+        else:
+            threading.Thread(target=self._thread_entry, args=(resume,), daemon=True).start()
+
+    def resume_contacting(self):
+        """Continue the campaign that was interrupted by a crash or a closed browser"""
+        recovered = campaign_log().recover()
+        if recovered is None:
+            messagebox.showinfo("Resume", "There is no interrupted campaign to resume.")
+            return
+        self.master.template_choice = recovered.template_choice
+        self.master.input_mode = recovered.input_mode or self.master.input_mode
+        self.load_contacts(recovered.remaining())
+        self.start_contacting(resume=True)
+
+    def _thread_entry(self, resume=False):
+        try:
+            result = asyncio.run(self.async_main(resume))
+        except Exception as e:
+            result = None
+            self.safe_log(f"❌ Unexpected error: {e}")
+        self.after(0, self._on_done, result)
 
-    def _thread_entry(self):
+    def _job_done(self, job):
+        """Done callback of a SenderService job (runs on the service thread)"""
         try:
-            result = asyncio.run(self.async_main())
+            result = job.result()
         except Exception as e:
             result = None
             self.safe_log(f"❌ Unexpected error: {e}")
         self.after(0, self._on_done, result)
 
-    async def async_main(self):
+    async def async_main(self, resume=False):
         return await send_messages(
             self.master.businesses,
             self.master.template_choice,
             log_cb=self.safe_log,
-            status_cb=self.set_row_status
+            status_cb=self.set_row_status,
+            bulk_status_cb=self.set_rows_status,
+            resume=resume,
+            input_mode=self.master.input_mode,
+            service=self.master.sender
         )
 
     def _on_done(self, result):
@@ -13,9 +13,12 @@ from playwright.async_api import async_playwright
 from helper import (
     load_json, save_json, save_all_state, save_contacted_item,
     save_failed_item, remove_from_pending_by_phone, random_delay,
-    is_priority_business
+    is_priority_business, set_pending, validity_cache
 )
 
+from phones import normalize_phone
+from validity import INVALID
+
 # Local imports (uncomment when needed)
 # from page1 import Page1
 # from pageTemplate import PageTemplate
@@ -43,7 +46,11 @@ class PageCleanContacts(tk.Frame):
                          text="Review & Clean Contacts", 
                          style='Header.TLabel')
         title.pack(side='left', padx=10)
-        
+
+        # Background WhatsApp login (see WhatsAppApp.prewarm_browser)
+        ttk.Label(header, textvariable=master.login_status,
+                  style='Subtitle.TLabel').pack(side='left', padx=10)
+
         # Stats bar
         self.stats_frame = ttk.Frame(self, style='Card.TFrame')
         self.stats_frame.pack(fill='x', padx=20, pady=(0, 15))
@@ -57,6 +64,12 @@ class PageCleanContacts(tk.Frame):
                                       text="Priority: 0", 
                                       style='Stat.TLabel')
         self.priority_label.pack(side='left', padx=15, pady=10)
+
+        # Numbers the validity cache already knows to be invalid
+        self.invalid_label = ttk.Label(self.stats_frame,
+                                     text="Known invalid: 0",
+                                     style='Stat.TLabel')
+        self.invalid_label.pack(side='left', padx=15, pady=10)
         
         # Main content area
         content = ttk.Frame(self)
@@ -129,6 +142,7 @@ class PageCleanContacts(tk.Frame):
         self.tree.tag_configure("priority", background='#fff3e0')  # Light orange for priority
         self.tree.tag_configure("even", background='#ffffff')     # White for even rows
         self.tree.tag_configure("odd", background='#f8f9fa')      # Light gray for odd rows
+        self.tree.tag_configure("knowninvalid", background='#ffebee', foreground='#c62828')  # Red for known invalid
         
         # Map iid -> business object
         self._iid_map = {}
@@ -210,6 +224,8 @@ class PageCleanContacts(tk.Frame):
             
             # Alternate row colors
             tags.append("even" if i % 2 == 0 else "odd")
+            if validity_cache().peek(phone) == INVALID:
+                tags.append("knowninvalid")
             
             # Insert the item
             iid = self.tree.insert(
@@ -227,7 +243,11 @@ class PageCleanContacts(tk.Frame):
         
         # Update stats
         self._update_stats()
-        self.status_var.set(f"Loaded {len(businesses)} contacts")
+        known_invalid = self._known_invalid()
+        if known_invalid:
+            self.status_var.set(f"Loaded {len(businesses)} contacts, {known_invalid} known invalid (red) will be skipped")
+        else:
+            self.status_var.set(f"Loaded {len(businesses)} contacts")
     
     def _update_stats(self):
         """Update the statistics display"""
@@ -237,6 +257,12 @@ class PageCleanContacts(tk.Frame):
         
         self.total_label.config(text=f"Total: {total}")
         self.priority_label.config(text=f"Priority: {priority}")
+        self.invalid_label.config(text=f"Known invalid: {self._known_invalid()}")
+
+    def _known_invalid(self):
+        """How many loaded numbers were seen invalid recently"""
+        cache = validity_cache()
+        return sum(1 for biz in self._iid_map.values() if cache.peek(biz.get("phone")) == INVALID)
     
     def _on_search(self, *args):
         """Handle search functionality"""
@@ -336,21 +362,20 @@ class PageCleanContacts(tk.Frame):
             
             # Update PENDING_LIST
             if biz:
-                phone = str(biz.get("phone", "")).strip()
+                phone = normalize_phone(biz.get("phone", ""))
                 name = biz.get("businessName", "")
                 
                 # Remove from PENDING_LIST
                 new_pending = []
                 for b in config.PENDING_LIST:
-                    b_phone = str(b.get("phone", "")).strip()
+                    b_phone = normalize_phone(b.get("phone", ""))
                     b_name = b.get("businessName", "")
                     if b_phone == phone and b_name == name:
                         continue  # Skip this item
                     new_pending.append(b)
                 
                 # Update global pending
-                config.PENDING_LIST = new_pending
-                save_json(config.PENDING_FILE, config.PENDING_LIST)
+                set_pending(new_pending)
                 
                 # Update stats
                 self._update_stats()
@@ -368,12 +393,11 @@ class PageCleanContacts(tk.Frame):
         for b in remaining:
             nb = dict(b)  # shallow copy
             nb.setdefault("businessName", nb.get("businessName", "Unknown"))
-            nb.setdefault("phone", str(nb.get("phone", "")).strip())
+            nb["phone"] = normalize_phone(nb.get("phone", "")) or str(nb.get("phone", "")).strip()
             normalized.append(nb)
         # Save
-        config.PENDING_LIST = normalized
         print(normalized,"Normalized")
-        save_json(config.PENDING_FILE, config.PENDING_LIST)
+        set_pending(normalized)
         # save_all_state()  # Save the complete application state
         # Move on
-        self.master.show_template_page(config.PENDING_LIST)
+        self.master.show_template_page(normalized)
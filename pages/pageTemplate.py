@@ -16,6 +16,8 @@ from helper import (
     is_priority_business
 )
 
+from .messageInput import INPUT_MODES
+
 # Local imports (uncomment when needed)
 # from page1 import Page1
 # from page2 import Page2
@@ -39,7 +41,11 @@ class PageTemplate(tk.Frame):
                          text="Choose Message Template", 
                          style='Header.TLabel')
         title.pack(side='left', padx=10)
-        
+
+        # Background WhatsApp login (see WhatsAppApp.prewarm_browser)
+        ttk.Label(header, textvariable=master.login_status,
+                  style='Subtitle.TLabel').pack(side='left', padx=10)
+
         # Main content
         content = ttk.Frame(self, style='Card.TFrame')
         content.pack(fill='both', expand=True, padx=20, pady=10)
@@ -130,6 +136,21 @@ class PageTemplate(tk.Frame):
         self.choice_var.trace('w', self._update_preview)
         self._update_preview()
         
+        # How the messages get into the composer
+        input_frame = ttk.Frame(content)
+        input_frame.pack(fill='x', padx=20, pady=(0, 10))
+
+        ttk.Label(input_frame,
+                 text="Typing mode:",
+                 style='Subtitle.TLabel').pack(side='left', padx=(0, 10))
+
+        self.input_mode_var = tk.StringVar(value=config.INPUT_MODE)
+        ttk.Combobox(input_frame,
+                    textvariable=self.input_mode_var,
+                    values=list(INPUT_MODES),
+                    state='readonly',
+                    width=14).pack(side='left')
+
         # Navigation buttons
         btn_frame = ttk.Frame(content)
         btn_frame.pack(fill='x', pady=(10, 5), padx=20)
@@ -160,4 +181,5 @@ class PageTemplate(tk.Frame):
     def confirm_choice(self):
         """Handle template selection confirmation"""
         self.master.template_choice = self.choice_var.get()
+        self.master.input_mode = self.input_mode_var.get()
         self.master.show_page2()
@@ -0,0 +1,72 @@
+import base64
+
+import config
+
+
+# 1x1 transparent GIF, served instead of blocked images in "stub" mode
+BLANK_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+
+class ResourceFilter:
+    """
+    Request filter for the sending browser context. Profile pictures, media
+    thumbnails, stickers and fonts are never needed to send a message, so
+    requests of config.BLOCK_RESOURCES types are aborted (or, in "stub" mode,
+    images get a blank GIF so the app doesn't retry them). Also counts the
+    responses that did load, to report bandwidth per chat: bytes are
+    Playwright's request sizes (headers plus the body as transferred), so
+    chunked and compressed responses count too.
+
+    Playwright turns off the HTTP cache of a routed context; WhatsApp Web
+    serves its own bundles from a service worker, which routing doesn't see.
+    """
+
+    def __init__(self, resource_types=None, mode=None):
+        self.resource_types = frozenset(config.BLOCK_RESOURCES if resource_types is None else resource_types)
+        self.mode = mode or config.BLOCK_MODE
+        self.blocked = 0
+        self.responses = 0
+        self.bytes_loaded = 0
+        self._context = None
+
+    async def install(self, context):
+        self._context = context
+        if self.resource_types:
+            await context.route("**/*", self._handle)
+        context.on("requestfinished", self._on_finished)
+
+    async def remove(self):
+        if self._context is None:
+            return
+        try:
+            if self.resource_types:
+                await self._context.unroute("**/*", self._handle)
+            self._context.remove_listener("requestfinished", self._on_finished)
+        except Exception:
+            pass  # the browser is already gone
+        self._context = None
+
+    async def _handle(self, route):
+        request = route.request
+        if request.resource_type not in self.resource_types:
+            await route.continue_()
+            return
+        self.blocked += 1
+        if self.mode == "stub" and request.resource_type == "image":
+            await route.fulfill(status=200, content_type="image/gif", body=BLANK_GIF)
+        else:
+            await route.abort("blockedbyclient")
+
+    async def _on_finished(self, request):
+        self.responses += 1
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return  # the page or browser went away meanwhile
+        self.bytes_loaded += max(sizes["responseBodySize"], 0) + max(sizes["responseHeadersSize"], 0)
+
+    def summary(self, chats):
+        """One log line: what was blocked and what was loaded per chat"""
+        per_chat = self.bytes_loaded / chats / 1024 if chats else 0
+        blocked = f"blocked {self.blocked} {'/'.join(sorted(self.resource_types))} request(s), " if self.resource_types else ""
+        return f"📉 Network: {blocked}{self.bytes_loaded / 1024 / 1024:.1f} MB loaded ({per_chat:.0f} KB per chat)"
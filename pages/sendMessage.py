@@ -3,6 +3,7 @@ import json
 import os
 import random
 import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import sys
@@ -13,9 +14,24 @@ from playwright.async_api import async_playwright
 from helper import (
     load_json, save_json, save_all_state, save_contacted_item,
     save_failed_item, remove_from_pending_by_phone, random_delay,
-    is_priority_business
+    is_priority_business, is_contacted, start_campaign, finish_campaign,
+    partition_contacted, remove_many_from_pending, campaign_log, rate_scheduler,
+    save_unconfirmed_item, resolve_unconfirmed, unconfirmed_records, save_failed_items,
+    validity_cache, record_validity, partition_known_invalid, retry_queue, schedule_retry, resolve_retry,
+    partition_retry_waiting, wait_for_writer, partition_unconfirmed
 )
 
+from phones import normalize_phone
+from campaignlog import OPENING, TYPED, SENT, CONFIRMED, FAILED
+from failures import FailReason
+from validity import ON_WHATSAPP, INVALID
+from scheduler import DailyCapReached
+from .messageInput import enter_message
+from .chatOpen import open_chat, reset_strategy_misses, CHAT_READY, CHAT_INVALID, CHAT_NAV_FAILED
+from .deliveryVerifier import DeferredBatch, verify_unconfirmed
+from .resourceFilter import ResourceFilter
+from .numberValidator import prevalidate
+
 # Local imports (uncomment when needed)
 # from page1 import Page1
 # from pageTemplate import PageTemplate
@@ -30,159 +46,649 @@ else:
     browser_path = None  # Use default installed location
 
 
-async def send_messages(businesses, template_choice, log_cb, status_cb):
+def compose_messages(name, template_choice):
+    return [
+        "ሰላም ጤና ይስጥልኝ",
+        f"ለ {name} {('ሎጎ' if template_choice == 'Logo' else 'Website')} ትፈልጋላችሁ?"
+    ]
+
+
+async def send_messages(businesses, template_choice, log_cb, status_cb, bulk_status_cb=None, resume=False, max_tabs=None,
+                        profiles=None, input_mode=None, service=None):
     """
     businesses: list of business objects (as in config.PENDING_LIST)
     template_choice: "Website" | "Logo"
     log_cb: function(text)
     status_cb: function(phone, status_text, tag)
+    bulk_status_cb: optional function(phones, status_text, tag) for many rows at once
+    resume: continue the campaign recorded in the write-ahead log instead of `businesses`
+    max_tabs: how many tabs send in parallel (default config.MAX_TABS)
+    profiles: browser profile dirs (default config.SESSION_PROFILES); more than one
+              runs a worker process per profile, see shardSender.py
+    input_mode: how messages are entered, a key of messageInput.INPUT_MODES (default config.INPUT_MODE)
+    service: optional senderService.SenderService whose warm browser is used (single profile only)
     """
-    result = {"total": len(businesses), "contacted": 0, "notfound": 0, "alreadyContacted": 0, "composerNotFound": 0, "failed": 0}
-    print("pending \n", config.PENDING_LIST)
-    async with async_playwright() as p:
+    wal = campaign_log()
+    in_doubt = set()
+    if resume:
+        recovered = wal.recover()
+        if recovered is None:
+            log_cb("⚠️ Nothing to resume.")
+            return {"total": 0, "contacted": 0, "notfound": 0, "alreadyContacted": 0, "composerNotFound": 0, "failed": 0}
+        template_choice = recovered.template_choice
+        input_mode = recovered.input_mode or input_mode
+        businesses = recovered.remaining()
+        in_doubt = recovered.in_doubt()
+        log_cb(f"⟲ Resuming campaign: {recovered.done_count()} done, "
+               f"{len(businesses)} left, {len(in_doubt)} to re-verify")
+
+    result = {"total": len(businesses), "contacted": 0, "notfound": 0, "alreadyContacted": 0, "composerNotFound": 0, "failed": 0,
+              "validityCacheHits": 0, "validityCacheHitRate": 0.0, "retried": 0, "backingOff": 0}
+
+    # Drop already contacted businesses before paying for a browser launch
+    already, to_send = partition_contacted(businesses)
+    if already:
+        skipped_phones = [normalize_phone(b["phone"]) for b in already]
+        log_cb(f"⏩ Already contacted: {len(already)} contact(s) skipped")
+        if bulk_status_cb:
+            bulk_status_cb(skipped_phones, "Already contacted", "skipped")
+        else:
+            for phone in skipped_phones:
+                status_cb(phone, "Already contacted", "skipped")
+        result["alreadyContacted"] += len(already)
+        # Ensure they're removed from pending so we don't try them again next run
+        remove_many_from_pending(skipped_phones)
+
+    # Numbers seen invalid recently are not worth a chat open
+    cache = validity_cache()
+    cache.reset_stats()
+    known_invalid, to_send = partition_known_invalid(to_send)
+    if known_invalid:
+        invalid_phones = [normalize_phone(b["phone"]) for b in known_invalid]
+        log_cb(f"⏩ Known invalid: {len(known_invalid)} number(s) skipped")
+        if bulk_status_cb:
+            bulk_status_cb(invalid_phones, "Invalid (known)", "invalid")
+        else:
+            for phone in invalid_phones:
+                status_cb(phone, "Invalid (known)", "invalid")
+        result["notfound"] += len(known_invalid)
+        remove_many_from_pending(invalid_phones)
+    _cache_stats(result, cache)
+
+    # Recent transient failures wait for their retry time instead of being hammered again
+    waiting, to_send = partition_retry_waiting(to_send)
+    if waiting:
+        log_cb(f"⏳ {len(waiting)} contact(s) still backing off after a failure (or out of retries for now), retried later")
+        for biz in waiting:
+            status_cb(normalize_phone(biz["phone"]), "Retry later", "skipped")
+        result["backingOff"] = len(waiting)
+
+    # Sent by an earlier run, only their delivery check is left: never typed twice
+    awaiting, to_send = partition_unconfirmed(to_send)
+    if awaiting:
+        log_cb(f"⏸ {len(awaiting)} contact(s) sent earlier, checking their delivery instead")
+        for biz in awaiting:
+            status_cb(normalize_phone(biz["phone"]), "Sent, unconfirmed", "working")
+    if not to_send and not awaiting:
+        wal.finish()
+        return result
+
+    if resume:
+        wal.attach(recovered)
+        for biz in already:
+            wal.mark(biz["phone"], CONFIRMED)
+    else:
+        wal.begin(to_send, template_choice, input_mode or config.INPUT_MODE)
+
+    sink = CampaignSink(wal, result)
+    if max_tabs is None:
+        max_tabs = config.MAX_TABS
+    if profiles is None:
+        profiles = config.SESSION_PROFILES
+    if input_mode is None:
+        input_mode = config.INPUT_MODE
+    start_campaign(template_choice)
+    try:
+        if len(profiles) > 1:
+            # Imported here, shardSender imports this module for its workers
+            from .shardSender import run_shards
+            finished = await run_shards(to_send, template_choice, log_cb, status_cb, sink, in_doubt, profiles, input_mode)
+        else:
+            finished = await _run_campaign(to_send, template_choice, log_cb, status_cb, sink, in_doubt,
+                                           max_tabs, profiles[0], input_mode, service)
+        if finished:
+            wal.finish()
+        return result
+    finally:
+        _cache_stats(result, cache)
+        finish_campaign(result)
+
+
+def _cache_stats(result, cache):
+    result["validityCacheHits"] = cache.hits
+    result["validityCacheHitRate"] = cache.hit_rate()
+
+
+class CampaignSink:
+    """
+    Everything _process_business records apart from the UI callbacks: WAL
+    transitions, result counters and outcomes in the state files. Shard
+    workers get a queue-backed stand-in and the coordinator replays their
+    calls into this one, so only one process ever writes the state.
+    """
+
+    def __init__(self, wal, result):
+        self.wal = wal
+        self.result = result
+        # Phones this run failed and scheduled a retry for: {phone: result key the failure was counted under}
+        self.retrying = {}
+
+    def mark(self, phone, state):
+        self.wal.mark(phone, state)
+
+    def count(self, key, n=1):
+        self.result[key] += n
+
+    def is_contacted(self, phone):
+        return is_contacted(phone)
+
+    def processed(self, phone):
+        remove_from_pending_by_phone(phone)
+
+    def contacted(self, name, phone):
+        save_contacted_item(name, phone)
+        remove_from_pending_by_phone(phone)
+        resolve_retry(phone)
+
+    def failed(self, name, phone, reason, error=None):
+        save_failed_item(name, phone, reason, error=error)
+        # Transient reasons back off for a retry, the rest end any retries
+        self._schedule_retry(name, phone, reason)
+
+    def _schedule_retry(self, name, phone, reason):
+        entry = schedule_retry(name, phone, reason)
+        if entry is not None and entry["due"] is not None:
+            no_composer = entry["reason"] == FailReason.NO_COMPOSER.value
+            self.retrying[entry["phone"]] = "composerNotFound" if no_composer else "failed"
+
+    def rejected(self, items, reason):
+        """Failed (name, phone) pairs that also leave pending, in one write each"""
+        save_failed_items(items, reason)
+        remove_many_from_pending([phone for _, phone in items])
+        for _, phone in items:
+            resolve_retry(phone)
+
+    def observed(self, phone, status):
+        record_validity(phone, status)
+
+    def unconfirmed(self, entry):
+        # Stays pending until the verifier has seen the ticks
+        save_unconfirmed_item(entry)
+
+    def delivered(self, name, phone):
+        save_contacted_item(name, phone)
+        remove_from_pending_by_phone(phone)
+        resolve_unconfirmed(phone)
+        resolve_retry(phone)
+
+    def undelivered(self, name, phone, reason):
+        # Still pending, so a later run (or the retry queue) sends it again
+        save_failed_item(name, phone, reason)
+        resolve_unconfirmed(phone)
+        self._schedule_retry(name, phone, reason)
+
+
+async def _already_in_chat(page, messages):
+    """
+    Which of `messages` are already visible as outgoing bubbles in the open chat.
+    Used for contacts that were mid-send when a previous run died.
+    """
+    found = []
+    for msg in messages:
+        try:
+            count = await page.locator("div.message-out span.selectable-text", has_text=msg).count()
+        except Exception:
+            count = 0
+        found.append(count > 0)
+    return found
+
+
+class AttachedContext:
+    """
+    The default context of a Chrome we attached to over CDP. Behaves like the
+    launched persistent context, except that close() only disconnects: the
+    operator's Chrome and its WhatsApp tab stay open for the next run.
+    """
+
+    def __init__(self, browser, context):
+        self._browser = browser
+        self._context = context
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+    async def close(self):
+        await self._browser.close()
+
+
+async def _attach_whatsapp(p, cdp_url, log_cb):
+    """(context, page) of a running Chrome at `cdp_url`, reusing its WhatsApp tab. None if nothing listens there"""
+    try:
+        browser = await p.chromium.connect_over_cdp(cdp_url, timeout=5_000)
+    except Exception:
+        log_cb(f"⚠️ No Chrome to attach to at {cdp_url}, launching one")
+        return None
+    context = AttachedContext(browser, browser.contexts[0])
+    for page in context.pages:
+        if page.url.startswith(config.WHATSAPP_URL):
+            log_cb("🔗 Attached to the open WhatsApp tab")
+            return context, page
+    log_cb("🔗 Attached to Chrome, opening a WhatsApp tab")
+    return context, await context.new_page()
+
+
+async def _open_whatsapp(p, user_data_dir, log_cb, cdp_url=None):
+    """
+    Get a logged-in WhatsApp page for one profile. Returns (browser, page) or None.
+    With `cdp_url` the Chrome already running there is used and launching the
+    persistent context is only the fallback.
+    """
+    opened = await _attach_whatsapp(p, cdp_url, log_cb) if cdp_url else None
+    if opened is not None:
+        browser, page = opened
+    else:
         browser = await p.chromium.launch_persistent_context(
-            user_data_dir="./whatsapp_session",
+            user_data_dir=user_data_dir,
             executable_path=browser_path,  # If None, Playwright will find installed browser
             headless=False
         )
         page = await browser.new_page()
 
+    if not page.url.startswith(config.WHATSAPP_URL):
         log_cb("📱 Opening WhatsApp Web…")
         try:
-            await page.goto("https://web.whatsapp.com/", timeout=120_000)
+            await page.goto(config.WHATSAPP_URL + "/", timeout=120_000)
             log_cb("- Whatsapp opened!")
         except Exception:
             log_cb("❌ Unable Accessing Whatsapp.")
             await browser.close()
-            return result
+            return None
+    try:
+        # Wait for general chats grid (logged-in indicator)
+        await page.wait_for_selector("div[role='grid']", timeout=120_000)
+        log_cb("✅ Logged in successfully!")
+    except Exception:
+        log_cb("❌ Login timeout.")
+        await browser.close()
+        return None
+    return browser, page
+
+
+async def _run_campaign(businesses, template_choice, log_cb, status_cb, sink, in_doubt, max_tabs=1,
+                        user_data_dir="./whatsapp_session", input_mode="human", service=None):
+    """
+    Returns True when every business was processed (the WAL can be dropped).
+    With a SenderService the browser is borrowed from it and stays open,
+    otherwise it is launched for this run and closed afterwards.
+    """
+    if service is not None:
+        opened = await service.session(user_data_dir, log_cb)
+        if opened is None:
+            return False
+        return await _send_in_session(*opened, businesses, template_choice, log_cb, status_cb, sink, in_doubt,
+                                      max_tabs, user_data_dir, input_mode)
+
+    async with async_playwright() as p:
+        opened = await _open_whatsapp(p, user_data_dir, log_cb, config.CDP_URL)
+        if opened is None:
+            return False
+        browser, page = opened
         try:
-            # Wait for general chats grid (logged-in indicator)
-            await page.wait_for_selector("div[role='grid']", timeout=120_000)
-            log_cb("✅ Logged in successfully!")
-        except Exception:
-            log_cb("❌ Login timeout.")
+            return await _send_in_session(browser, page, businesses, template_choice, log_cb, status_cb, sink,
+                                          in_doubt, max_tabs, user_data_dir, input_mode)
+        finally:
             await browser.close()
-            return result
 
-        # We'll iterate over a shallow copy — config.PENDING_LIST will be updated on disk during processing
-        for biz in list(businesses):
-            phone = str(biz["phone"]).strip()
-            name = biz["businessName"]
 
-            if not phone:
-                log_cb(f"⚠️ Missing phone for {name}")
-                continue
+async def _send_in_session(browser, page, businesses, template_choice, log_cb, status_cb, sink, in_doubt, max_tabs,
+                           user_data_dir, input_mode):
+    """Send the campaign through an open, logged-in session of `user_data_dir`"""
+    # The process (and a SenderService) outlives the campaign, the misses are per run
+    reset_strategy_misses()
+    claimed = set()
+    pacer = rate_scheduler(user_data_dir)
+    deferred = DeferredBatch(user_data_dir) if config.DEFERRED_CONFIRMATION else None
+    res_filter = ResourceFilter()
+    await res_filter.install(browser)
+    try:
+        if config.PREVALIDATE:
+            businesses = await prevalidate(browser, page, businesses, log_cb, status_cb, sink, pacer)
+        finished = await _send_all(browser, page, businesses, template_choice, log_cb, status_cb, sink, in_doubt,
+                                   max_tabs, user_data_dir, input_mode, claimed, pacer, deferred)
+    finally:
+        # The browser may stay open for later campaigns, leave it unfiltered
+        await res_filter.remove()
+    log_cb(res_filter.summary(len(claimed)))
+    return finished
 
-            isPhoneContacted = False
 
-            for p in config.CONTACTED_LIST:
-                isPhoneContacted = p["phone"] == phone or isPhoneContacted
-            
-            if isPhoneContacted:
-                log_cb(f"⏩ Already contacted: {name} ({phone})")
-                status_cb(phone, "Already contacted", "skipped")
-                result["alreadyContacted"] += 1
-                # Ensure it's removed from pending so we don't try it again next run
-                remove_from_pending_by_phone(phone)
-                continue
-            
+async def _send_all(browser, page, businesses, template_choice, log_cb, status_cb, sink, in_doubt, max_tabs,
+                    user_data_dir, input_mode, claimed, pacer, deferred):
+    """Main pass over `businesses`, due retries, then the deferred delivery check"""
+    finished = True
+    try:
+        if max_tabs <= 1 and config.LOOKAHEAD:
+            await _run_pipeline(browser, page, businesses, template_choice, log_cb, status_cb, sink, in_doubt, claimed,
+                                pacer, input_mode, deferred)
+        elif max_tabs <= 1:
+            for biz in list(businesses):
+                await _process_business(page, biz, template_choice, log_cb, status_cb, sink, in_doubt, claimed, pacer,
+                                        input_mode, deferred)
+        else:
+            await _run_tabs(browser, page, businesses, max_tabs, template_choice, log_cb, status_cb, sink, in_doubt,
+                            claimed, pacer, input_mode, deferred)
+        await _drain_retries(page, template_choice, log_cb, status_cb, sink, in_doubt, claimed, pacer, input_mode,
+                             deferred)
+    except DailyCapReached as e:
+        log_cb(f"🛑 {e}, the rest stays pending (use Resume tomorrow)")
+        finished = False
+
+    # Also pick up chats a previous run sent but never got to check
+    current = deferred.entries if deferred is not None else []
+    sent_now = {e["phone"] for e in current}
+    earlier = [e for e in unconfirmed_records(user_data_dir) if e["phone"] not in sent_now]
+    if earlier or current:
+        left = await verify_unconfirmed(page, earlier + current, log_cb, status_cb, sink, pacer)
+        if left:
+            log_cb(f"⏸ {len(left)} chat(s) still unconfirmed, they are checked again next run")
+
+    return finished
 
-            status_cb(phone, "Opening chat…", "working")
-            # open direct chat URL
-            try:
-                await page.goto(f"https://web.whatsapp.com/send?phone={phone}", timeout=30_000)
-            except Exception:
-                # If page.goto fails for this URL, mark as failed and continue
-                log_cb(f"❌ Failed to open chat for {name} ({phone})")
-                status_cb(phone, "Failed to open", "invalid")
-                # save_failed_item(name, phone, "open_chat_failed")
-                # remove_from_pending_by_phone(phone)
-                result["failed"] += 1
-                continue
 
-            # await random_delay(4000, 7000)
+async def _run_tabs(browser, first_page, businesses, max_tabs, template_choice, log_cb, status_cb, sink, in_doubt, claimed,
+                    pacer, input_mode="human", deferred=None):
+    """
+    Drive `max_tabs` tabs of the logged-in context from one shared queue.
+
+    Most of a contact's time is spent waiting on selectors, so while one tab
+    waits for a chat to load or a tick to appear the others keep working.
+    Each worker owns its page; the sink (results, WAL, state writes) is shared but
+    everything runs on this one event loop, so no locking is needed. The tabs
+    share the session's pacer, so more tabs never means a higher send rate
+    than the session allows, only less idle waiting.
+    """
+    queue = asyncio.Queue()
+    for biz in businesses:
+        queue.put_nowait(biz)
+    tabs = min(max_tabs, len(businesses))
+    log_cb(f"🗂 Sending with {tabs} tabs")
 
-            # detect invalid number / not on whatsapp
-            invalid = False
+    async def worker(tab):
+        page = first_page if tab == 1 else await browser.new_page()
+        tab_log = lambda text: log_cb(f"[tab {tab}] {text}")
+        while not cap_hit:
             try:
-                # wait a short time for alert that indicates invalid number
-                await page.wait_for_selector("div[role='alert']", timeout=4000)
-                html = (await page.content()).lower()
-                if "invalid" in html or "not on whatsapp" in html or "phone number shared via url is invalid" in html:
-                    invalid = True
-            except Exception:
-                pass
-
-            if invalid:
-                log_cb(f"🔴 Invalid number: {phone}")
-                status_cb(phone, "Invalid", "invalid")
-                result["notfound"] += 1
-                save_failed_item(name, phone, "invalid_number")
-                remove_from_pending_by_phone(phone)
-                print(f"Invalid number {name} ")
+                biz = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            try:
+                await _process_business(page, biz, template_choice, tab_log, status_cb, sink, in_doubt, claimed, pacer,
+                                        input_mode, deferred)
+            except DailyCapReached as e:
+                cap_hit.append(e)
+            except Exception as e:
+                # Keep the worker alive, the contact stays pending for the next run
+                tab_log(f"❌ Unexpected error for {biz.get('businessName')}: {e}")
+                status_cb(normalize_phone(biz.get("phone")), "Failed", "invalid")
+            finally:
+                queue.task_done()
+        if page is not first_page:
+            await page.close()
+
+    cap_hit = []
+    await asyncio.gather(*(worker(i) for i in range(1, tabs + 1)))
+    if cap_hit:
+        raise cap_hit[0]
+
+
+async def _drain_retries(page, template_choice, log_cb, status_cb, sink, in_doubt, claimed, pacer, input_mode="human",
+                         deferred=None):
+    """
+    Retry this run's failures (sink.retrying) in `page` as they come due,
+    earliest first, waiting for the next one while it is at most
+    config.RETRY_DRAIN_WINDOW seconds away. A retry that fails again is
+    rescheduled by the sink with a longer backoff. Entries of earlier runs are
+    left to the runs that send those contacts again.
+    """
+    queue = retry_queue()
+    while sink.retrying:
+        due, next_due = queue.due_among(list(sink.retrying))
+        if not due:
+            if next_due is None or next_due - time.time() > config.RETRY_DRAIN_WINDOW:
+                break
+            log_cb(f"⏳ Next retry in {max(next_due - time.time(), 0):.0f}s")
+            await asyncio.sleep(max(next_due - time.time(), 0))
+            continue
+        for entry in due:
+            phone = entry["phone"]
+            counted_as = sink.retrying.pop(phone)
+            if sink.is_contacted(phone) or phone not in config.PENDING_LIST:
+                # Delivered in the meantime or deleted by the operator
+                resolve_retry(phone)
                 continue
+            log_cb(f"🔁 Retry {entry['attempt']} for {entry['businessName']} ({phone}), was {entry['reason']}")
+            # Already claimed by the pass that failed it
+            claimed.discard(phone)
+            biz = {"businessName": entry["businessName"], "phone": phone}
+            # Raises DailyCapReached before opening anything, the failure then stays counted
+            composer = await _open_business(page, biz, log_cb, status_cb, sink, claimed, pacer)
+            # Past the pacer: the retry's own outcome replaces the failure this run counted
+            sink.count("retried")
+            sink.count(counted_as, -1)
+            if composer is not None:
+                await _send_business(page, biz, composer, template_choice, log_cb, status_cb, sink, in_doubt, pacer,
+                                     input_mode, deferred)
 
-            # find composer (input/footer)
-            try:
-                composer = await page.wait_for_selector('footer div[contenteditable="true"]', timeout=15000)
-            except Exception:
-                log_cb(f"❌ No composer for {name} ({phone})")
-                status_cb(phone, "No composer", "invalid")
-                result["composerNotFound"] += 1
-                save_failed_item(name, phone, "no_composer")
-                print(f"Composer not found {name} ")
+
+async def _run_pipeline(browser, first_page, businesses, template_choice, log_cb, status_cb, sink, in_doubt, claimed,
+                        pacer, input_mode="human", deferred=None):
+    """
+    Two tabs one contact apart: while contact i is typed and confirmed in one
+    tab, the other is already opening and classifying contact i+1, then they
+    swap. Navigation time hides behind confirmation time, but only one chat is
+    ever being typed into, so sends stay strictly in order.
+    """
+    pages = [first_page, await browser.new_page()]
+    pending = iter(list(businesses))
+
+    def open_next(page):
+        """Start opening the next contact in `page`, None when there is none left"""
+        biz = next(pending, None)
+        if biz is None:
+            return None
+        return asyncio.ensure_future(_open_lookahead(page, biz, log_cb, status_cb, sink, claimed, pacer))
+
+    turn = 0
+    opening = open_next(pages[turn])
+    try:
+        while opening is not None:
+            biz, composer = await opening
+            page = pages[turn]
+            turn ^= 1
+            opening = open_next(pages[turn])
+            if composer is not None:
+                await _send_business(page, biz, composer, template_choice, log_cb, status_cb, sink, in_doubt, pacer,
+                                     input_mode, deferred)
+    finally:
+        if opening is not None:
+            opening.cancel()
+            await asyncio.gather(opening, return_exceptions=True)
+        await pages[1].close()
+
+
+async def _open_lookahead(page, biz, log_cb, status_cb, sink, claimed, pacer):
+    try:
+        return biz, await _open_business(page, biz, log_cb, status_cb, sink, claimed, pacer)
+    except DailyCapReached:
+        raise
+    except Exception as e:
+        # Same as a failed send: the contact stays pending for the next run
+        log_cb(f"❌ Unexpected error for {biz.get('businessName')}: {e}")
+        status_cb(normalize_phone(biz.get("phone")), "Failed", "invalid")
+        return biz, None
+
+
+async def _process_business(page, biz, template_choice, log_cb, status_cb, sink, in_doubt, claimed, pacer,
+                            input_mode="human", deferred=None):
+    """
+    Open the chat for one business in `page`, send the messages and record the
+    outcome. With a DeferredBatch the delivery ticks are left to the verifier.
+    """
+    composer = await _open_business(page, biz, log_cb, status_cb, sink, claimed, pacer)
+    if composer is not None:
+        await _send_business(page, biz, composer, template_choice, log_cb, status_cb, sink, in_doubt, pacer,
+                             input_mode, deferred)
+
+
+async def _open_business(page, biz, log_cb, status_cb, sink, claimed, pacer):
+    """
+    First half of _process_business: skip checks, pacing and opening the chat.
+    Returns the composer when the chat is ready, otherwise records why not and
+    returns None.
+    """
+    phone = normalize_phone(biz["phone"])
+    name = biz["businessName"]
+
+    if not phone:
+        log_cb(f"⚠️ Missing phone for {name}")
+        sink.mark(biz["phone"], FAILED)
+        return
+
+    # Same phone listed twice in this batch (or being sent in another tab)
+    if phone in claimed:
+        log_cb(f"⏩ Duplicate in this batch: {name} ({phone})")
+        return
+    claimed.add(phone)
+    if sink.is_contacted(phone):
+        log_cb(f"⏩ Already contacted: {name} ({phone})")
+        status_cb(phone, "Already contacted", "skipped")
+        sink.count("alreadyContacted")
+        # Ensure it's removed from pending so we don't try it again next run
+        sink.processed(phone)
+        sink.mark(phone, CONFIRMED)
+        return
+
+    # Token buckets + daily cap of this session, raises DailyCapReached
+    status_cb(phone, "Waiting for send slot…", "working")
+    await wait_for_writer()
+    await pacer.wait_turn()
+
+    status_cb(phone, "Opening chat…", "working")
+    sink.mark(phone, OPENING)
+    # Open the chat and race composer / invalid alert / navigation failure
+    outcome, detail = await open_chat(page, phone)
+
+    if outcome == CHAT_NAV_FAILED:
+        # If the navigation fails for this URL, mark as failed and continue
+        log_cb(f"❌ Failed to open chat for {name} ({phone})")
+        status_cb(phone, "Failed to open", "invalid")
+        # Stays pending, the retry queue brings it back after a backoff
+        sink.failed(name, phone, FailReason.OPEN_CHAT_FAILED, error=str(detail))
+        sink.count("failed")
+        sink.mark(phone, FAILED)
+        return
+
+    if outcome == CHAT_INVALID:
+        log_cb(f"🔴 Invalid number: {phone}")
+        status_cb(phone, "Invalid", "invalid")
+        sink.count("notfound")
+        sink.failed(name, phone, FailReason.INVALID_NUMBER)
+        sink.observed(phone, INVALID)
+        sink.processed(phone)
+        sink.mark(phone, FAILED)
+        print(f"Invalid number {name} ")
+        return
+
+    if outcome != CHAT_READY:
+        log_cb(f"❌ No composer for {name} ({phone})")
+        status_cb(phone, "No composer", "invalid")
+        sink.count("composerNotFound")
+        sink.failed(name, phone, FailReason.NO_COMPOSER)
+        sink.mark(phone, FAILED)
+        print(f"Composer not found {name} ")
+        return
+    sink.observed(phone, ON_WHATSAPP)
+    return detail
+
+
+async def _send_business(page, biz, composer, template_choice, log_cb, status_cb, sink, in_doubt, pacer,
+                         input_mode="human", deferred=None):
+    """Second half of _process_business: type the messages into the open chat and record the outcome"""
+    phone = normalize_phone(biz["phone"])
+    name = biz["businessName"]
+
+    # Compose messages
+    messages = compose_messages(name, template_choice)
+
+    # A contact that was mid-send when the last run died may already
+    # have some of the messages, only type the missing ones
+    already_sent = [False] * len(messages)
+    if phone in in_doubt:
+        already_sent = await _already_in_chat(page, messages)
+        if any(already_sent):
+            log_cb(f"⟲ {sum(already_sent)} message(s) already in chat with {name}, not retyping")
+
+    try:
+        all_sent = True  # track if all messages are sent/read
+
+        # First, send all messages
+        for msg, sent_before in zip(messages, already_sent):
+            if sent_before:
                 continue
+            await enter_message(page, composer, msg, input_mode)
+            await page.keyboard.press("Enter")
+            log_cb(f"⏳ Message queued: {msg[:30]}...")
+            await pacer.message_gap()  # Small delay between messages
+        sink.mark(phone, TYPED)
 
-            # Compose messages
-            messages = [
-                "ሰላም ጤና ይስጥልኝ",
-                f"ለ {name} {('ሎጎ' if template_choice == 'Logo' else 'Website')} ትፈልጋላችሁ?"
-            ]
+        if deferred is not None:
+            log_cb(f"📨 Sent to {name} ({phone}), delivery is checked later")
+            status_cb(phone, "Sent, unconfirmed", "working")
+            sink.unconfirmed(deferred.add(name, phone, messages))
+            sink.mark(phone, SENT)
+            return
 
+        # After all messages are sent, verify status for each message
+        for i, msg in enumerate(messages, 1):
             try:
-                all_sent = True  # track if all messages are sent/read
-
-                # First, send all messages
-                for msg in messages:
-                    await composer.type(msg, delay=random.randint(50, 55))
-                    await page.keyboard.press("Enter")
-                    log_cb(f"⏳ Message queued: {msg[:30]}...")
-                    await asyncio.sleep(1)  # Small delay between messages
-
-                # After all messages are sent, verify status for each message
-                for i, msg in enumerate(messages, 1):
-                    try:
-                        # Wait for either sent (✓) or read (✓✓) status for each message
-                        # Using nth-match to find the specific message's status
-                        await page.wait_for_selector(
-                            f'(//span[@data-icon="msg-check" or @data-icon="msg-dblcheck"])[{i}]',
-                            timeout=30000
-                        )
-                        log_cb(f"✅ Message {i} confirmed (Sent/Read): {msg[:30]}...")
-                    except Exception as e:
-                        log_cb(f"❌ Message {i} not confirmed: {msg[:30]}... Error: {str(e)}")
-                        all_sent = False
-                        break  # Stop checking if one fails
-
-                if all_sent:
-                    log_cb(f"🟢 All messages sent to {name} ({phone})")
-                    status_cb(phone, "Sent", "sent")
-                    result["contacted"] += 1
-                    save_contacted_item(name, phone)
-                    remove_from_pending_by_phone(phone)
-                else:
-                    log_cb(f"❌ Not all messages sent to {name} ({phone})")
-                    status_cb(phone, "Failed", "invalid")
-                    result["failed"] += 1
-                    save_failed_item(name, phone, "one_or_more_unsent")
-
+                # Wait for either sent (✓) or read (✓✓) status for each message
+                # Using nth-match to find the specific message's status
+                await page.wait_for_selector(
+                    f'(//span[@data-icon="msg-check" or @data-icon="msg-dblcheck"])[{i}]',
+                    timeout=30000
+                )
+                log_cb(f"✅ Message {i} confirmed (Sent/Read): {msg[:30]}...")
             except Exception as e:
-                log_cb(f"❌ Failed to send to {name}: {e}")
-                status_cb(phone, "Failed", "invalid")
-                result["failed"] += 1
-                save_failed_item(name, phone, str(e))
-
+                log_cb(f"❌ Message {i} not confirmed: {msg[:30]}... Error: {str(e)}")
+                all_sent = False
+                break  # Stop checking if one fails
 
-        await browser.close()
+        if all_sent:
+            log_cb(f"🟢 All messages sent to {name} ({phone})")
+            status_cb(phone, "Sent", "sent")
+            sink.count("contacted")
+            sink.contacted(name, phone)
+            sink.mark(phone, CONFIRMED)
+        else:
+            log_cb(f"❌ Not all messages sent to {name} ({phone})")
+            status_cb(phone, "Failed", "invalid")
+            sink.count("failed")
+            sink.failed(name, phone, FailReason.ONE_OR_MORE_UNSENT)
+            sink.mark(phone, FAILED)
 
-    return result
+    except Exception as e:
+        log_cb(f"❌ Failed to send to {name}: {e}")
+        status_cb(phone, "Failed", "invalid")
+        sink.count("failed")
+        sink.failed(name, phone, FailReason.SEND_ERROR, error=str(e))
+        sink.mark(phone, FAILED)
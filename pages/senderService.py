@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+from playwright.async_api import async_playwright
+
+import config
+from .sendMessage import send_messages, _open_whatsapp
+
+
+class SenderService:
+    """
+    Long-lived sender: one event loop thread and one Playwright runtime for
+    the whole app, with the logged-in browser of each profile kept open
+    between campaigns. Campaigns are submitted as jobs and run one at a time,
+    so only the first one pays for Chromium start-up and the WhatsApp login.
+
+    Multi-profile campaigns still run in their own worker processes (see
+    shardSender.py), the service only keeps single-profile sessions warm.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = None
+        self._playwright = None
+        self._sessions = {}  # profile dir -> (browser, page)
+        self._job_lock = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_loop, name="sender-service", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._job_lock = asyncio.Lock()
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Run `coro` on the service loop, returns a concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._job(coro), self.loop)
+
+    def submit_campaign(self, businesses, template_choice, log_cb, status_cb, **kwargs):
+        """Queue a send_messages run on the warm session, returns a Future of its result dict"""
+        return self.submit(send_messages(businesses, template_choice, log_cb, status_cb, service=self, **kwargs))
+
+    def prewarm(self, profile, log_cb):
+        """
+        Launch and log in `profile` in the background before any campaign is
+        submitted. It runs as a job, so a campaign started meanwhile waits for
+        it and then gets the warm page. Future of True once logged in.
+        """
+        return self.submit(self._prewarm(profile, log_cb))
+
+    async def _prewarm(self, profile, log_cb):
+        return await self.session(profile, log_cb) is not None
+
+    def is_warm(self, profile):
+        return profile in self._sessions
+
+    async def _job(self, coro):
+        # Jobs share the browser, so they take turns
+        async with self._job_lock:
+            return await coro
+
+    # -------------------------------
+    # Sessions (called on the service loop)
+    # -------------------------------
+
+    async def session(self, profile, log_cb):
+        """(browser, page) of `profile`, launched and logged in on first use. None if that failed"""
+        cached = self._sessions.get(profile)
+        if cached is not None:
+            if await self._still_logged_in(cached[1]):
+                log_cb("♻️ Reusing the open WhatsApp session")
+                return cached
+            log_cb("⚠️ WhatsApp session was closed or logged out, opening it again…")
+            await self._close_session(profile)
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        opened = await _open_whatsapp(self._playwright, profile, log_cb, config.CDP_URL)
+        if opened is None:
+            return None
+        browser = opened[0]
+        # Closing the window by hand drops the session, the next job relaunches it
+        browser.on("close", lambda _: self._sessions.pop(profile, None))
+        self._sessions[profile] = opened
+        return opened
+
+    async def _still_logged_in(self, page):
+        if page.is_closed():
+            return False
+        try:
+            await page.wait_for_selector("div[role='grid']", timeout=5_000)
+            return True
+        except Exception:
+            return False
+
+    async def _close_session(self, profile):
+        opened = self._sessions.pop(profile, None)
+        if opened is not None:
+            try:
+                await opened[0].close()
+            except Exception:
+                pass
+
+    async def _close_all(self):
+        for profile in list(self._sessions):
+            await self._close_session(profile)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def shutdown(self, timeout=30):
+        """Close the browsers and stop the loop thread (call once, on app exit)"""
+        if self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), self.loop).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
@@ -0,0 +1,201 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+
+import config
+from playwright.async_api import async_playwright
+
+from helper import rate_scheduler, unconfirmed_records
+from phones import normalize_phone
+from scheduler import DailyCapReached
+from .sendMessage import _open_whatsapp, _process_business
+from .deliveryVerifier import DeferredBatch, verify_unconfirmed
+from .resourceFilter import ResourceFilter
+
+
+# -------------------------------
+# Worker side (one process per profile)
+# -------------------------------
+
+class QueueSink:
+    """
+    Stand-in for sendMessage.CampaignSink inside a worker process: every call
+    is forwarded to the coordinator, which owns the WAL and the state files.
+    """
+
+    def __init__(self, events, shard):
+        self.events = events
+        self.shard = shard
+
+    def _send(self, method, *args):
+        self.events.put(("sink", self.shard, (method, args)))
+
+    def mark(self, phone, state):
+        self._send("mark", phone, state)
+
+    def count(self, key, n=1):
+        self._send("count", key, n)
+
+    def is_contacted(self, phone):
+        # The coordinator only queues numbers that aren't contacted yet
+        return False
+
+    def processed(self, phone):
+        self._send("processed", phone)
+
+    def contacted(self, name, phone):
+        self._send("contacted", name, phone)
+
+    def failed(self, name, phone, reason, error=None):
+        self._send("failed", name, phone, reason, error)
+
+    def observed(self, phone, status):
+        self._send("observed", phone, status)
+
+    def unconfirmed(self, entry):
+        self._send("unconfirmed", entry)
+
+    def delivered(self, name, phone):
+        self._send("delivered", name, phone)
+
+    def undelivered(self, name, phone, reason):
+        self._send("undelivered", name, phone, reason)
+
+
+def _shard_worker(shard, profile, template_choice, in_doubt, tasks, events, input_mode="human", earlier=()):
+    """Process entry point, must stay a module-level function for spawn"""
+    ok = False
+    try:
+        ok = asyncio.run(_shard_main(shard, profile, template_choice, in_doubt, tasks, events, input_mode, earlier))
+    except Exception as e:
+        events.put(("log", shard, (f"[{_label(profile)}] ❌ Worker crashed: {e}",)))
+    finally:
+        events.put(("done", shard, (ok,)))
+
+
+async def _shard_main(shard, profile, template_choice, in_doubt, tasks, events, input_mode, earlier=()):
+    sink = QueueSink(events, shard)
+    log_cb = lambda text: events.put(("log", shard, (f"[{_label(profile)}] {text}",)))
+    status_cb = lambda phone, text, tag: events.put(("status", shard, (phone, text, tag)))
+    loop = asyncio.get_running_loop()
+    claimed = set()
+    async with async_playwright() as p:
+        opened = await _open_whatsapp(p, profile, log_cb)
+        if opened is None:
+            return False
+        browser, page = opened
+        # Each profile is its own account, so each worker paces itself
+        pacer = rate_scheduler(profile)
+        # Chats are verified by the profile that sent them, before it exits
+        deferred = DeferredBatch(profile) if config.DEFERRED_CONFIRMATION else None
+        res_filter = ResourceFilter()
+        await res_filter.install(browser)
+        finished = True
+        try:
+            while True:
+                biz = await loop.run_in_executor(None, tasks.get)
+                if biz is None:
+                    break
+                await _process_business(page, biz, template_choice, log_cb, status_cb, sink, in_doubt, claimed, pacer,
+                                        input_mode, deferred)
+        except DailyCapReached as e:
+            log_cb(f"🛑 {e}, leaving the rest to the other profiles")
+            finished = False
+        # This profile's sends from earlier runs are checked along with this run's
+        unconfirmed = list(earlier) + (deferred.entries if deferred is not None else [])
+        if unconfirmed:
+            await verify_unconfirmed(page, unconfirmed, log_cb, status_cb, sink, pacer)
+        log_cb(res_filter.summary(len(claimed)))
+        await browser.close()
+    return finished
+
+
+def _label(profile):
+    return os.path.basename(os.path.normpath(profile)) or profile
+
+
+# -------------------------------
+# Coordinator side (the app process)
+# -------------------------------
+
+async def run_shards(businesses, template_choice, log_cb, status_cb, sink, in_doubt, profiles, input_mode="human"):
+    """
+    Send `businesses` from one worker process per profile.
+
+    Workers pull from a single shared task queue, so the work is partitioned
+    by demand: a slow or stuck browser only holds the contact it is on while
+    the others keep draining the queue. Everything a worker records comes back
+    over the events queue and is applied here through `sink`, so this process
+    stays the only writer of the WAL and the state files. WAL transitions are
+    therefore written when the coordinator receives them, slightly after the
+    worker acted, rather than before.
+
+    Returns True when every worker ran to the end of the queue.
+    """
+    # spawn: a clean interpreter per worker, and the only mode on Windows
+    ctx = multiprocessing.get_context("spawn")
+    tasks, events = ctx.Queue(), ctx.Queue()
+    seen = set()
+    for biz in businesses:
+        key = normalize_phone(biz.get("phone"))
+        if key in seen:
+            continue
+        seen.add(key)
+        tasks.put(biz)
+    for _ in profiles:
+        tasks.put(None)
+
+    # Chats sent earlier are checked by the profile that sent them (the first one
+    # takes entries from before profiles were recorded)
+    earlier = [
+        [e for e in unconfirmed_records() if e.get("profile") == profile or (i == 0 and e.get("profile") is None)]
+        for i, profile in enumerate(profiles)
+    ]
+    procs = [
+        ctx.Process(target=_shard_worker,
+                    args=(i, profile, template_choice, set(in_doubt), tasks, events, input_mode, earlier[i]),
+                    daemon=True)
+        for i, profile in enumerate(profiles)
+    ]
+    for proc in procs:
+        proc.start()
+    log_cb(f"🧩 Sending from {len(procs)} profiles: {', '.join(_label(p) for p in profiles)}")
+
+    def apply(kind, shard, args):
+        if kind == "sink":
+            method, margs = args
+            getattr(sink, method)(*margs)
+        elif kind == "log":
+            log_cb(*args)
+        elif kind == "status":
+            status_cb(*args)
+        elif kind == "done":
+            running.discard(shard)
+            finished[shard] = args[0]
+
+    loop = asyncio.get_running_loop()
+    running = set(range(len(procs)))
+    finished = {}
+    while running:
+        try:
+            kind, shard, args = await loop.run_in_executor(None, events.get, True, 0.5)
+        except queue.Empty:
+            for i in list(running):
+                if not procs[i].is_alive():
+                    running.discard(i)
+                    log_cb(f"⚠️ Profile {_label(profiles[i])} stopped unexpectedly")
+            continue
+        apply(kind, shard, args)
+
+    # Events a dead worker managed to send before it went away
+    while True:
+        try:
+            apply(*events.get_nowait())
+        except queue.Empty:
+            break
+    for proc in procs:
+        proc.join(timeout=5)
+    # Contacts nobody picked up stay in pending, don't block on flushing them
+    tasks.cancel_join_thread()
+    return len(finished) == len(procs) and all(finished.values())
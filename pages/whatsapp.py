@@ -21,6 +21,7 @@ from .page1 import Page1
 from .pageTemplate import PageTemplate
 from .page2 import Page2
 from .pageCleanContact import PageCleanContacts
+from .senderService import SenderService
 
 # -------------------------------
 # Tkinter App
@@ -341,6 +342,11 @@ class WhatsAppApp(tk.Tk):
         # master.businesses will be the list currently loaded in UI (pending list)
         self.businesses = list(config.PENDING_LIST)  # start from persisted pending if exists
         self.template_choice = "Website"  # default
+        self.input_mode = config.INPUT_MODE
+        # Owns the browser between campaigns, None launches one per campaign
+        self.sender = SenderService() if config.KEEP_BROWSER_OPEN else None
+        self.login_status = tk.StringVar(value="WhatsApp: not opened yet")
+        self._prewarm = None
 
         # Pages
         self.page1 = Page1(self)
@@ -368,6 +374,28 @@ class WhatsAppApp(tk.Tk):
         self.page_clean.load_contacts(businesses)
         self.page_clean.pack(fill="both", expand=True)
         self.update_idletasks()
+        self.prewarm_browser()
+
+    def prewarm_browser(self):
+        """Open WhatsApp in the background while the contacts are reviewed"""
+        if self.sender is None or not config.PREWARM_BROWSER or len(config.SESSION_PROFILES) != 1:
+            return
+        profile = config.SESSION_PROFILES[0]
+        if self._prewarm is not None or self.sender.is_warm(profile):
+            return
+        self.login_status.set("WhatsApp: ⏳ opening in the background…")
+        status_cb = lambda text: self.after(0, self.login_status.set, f"WhatsApp: {text}")
+        self._prewarm = self.sender.prewarm(profile, status_cb)
+        self._prewarm.add_done_callback(lambda job: self.after(0, self._prewarm_done, job))
+
+    def _prewarm_done(self, job):
+        self._prewarm = None
+        try:
+            ready = job.result()
+        except Exception:
+            ready = False
+        # Failed warm-ups are retried the next time the review page is shown
+        self.login_status.set("WhatsApp: ✅ ready" if ready else "WhatsApp: ⚠️ not ready, opens on Start")
 
     def show_template_page(self, businesses):
         """Show the template selection page"""
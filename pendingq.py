@@ -0,0 +1,189 @@
+import hashlib
+import os
+import threading
+
+import codec
+from phones import normalize_phone
+from writer import write_json_atomic
+
+
+def _digest(raw):
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+class PendingQueue:
+    """
+    Pending businesses kept as a base snapshot plus a tombstone log.
+
+    pending.json holds the list as it was last compacted, and every processed
+    number is appended as one line to a small side log instead of rewriting the
+    list. The in-memory view keeps a head offset (everything before it is done)
+    and a tombstone set for numbers removed out of order, so removing a number is
+    O(1). After `compact_every` removals the live list is written back as the new
+    snapshot and the log is truncated.
+
+    The log starts with a "@<digest>" line naming the snapshot it applies to.
+    A log left over from an older snapshot (a crash between writing a new one
+    and truncating the log, e.g. right after `reset()`) is ignored on load
+    instead of deleting re-pasted numbers from the new list.
+
+    Without file paths the queue lives in memory only (used by the sqlite backend,
+    which persists pending rows itself).
+    """
+
+    def __init__(self, snapshot_file=None, log_file=None, compact_every=500, writer=None):
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file
+        self.compact_every = compact_every
+        self.writer = writer
+        self._lock = threading.RLock()
+        self._fh = None
+        self._digest = _digest(b"")  # of the snapshot file on disk
+        self._rebase([])
+
+    def _rebase(self, items):
+        self._items = list(items)
+        self._keys = [normalize_phone(b.get("phone", "")) for b in self._items]
+        self._last_pos = {}
+        self._occurrences = {}
+        for pos, key in enumerate(self._keys):
+            self._last_pos[key] = pos
+            self._occurrences[key] = self._occurrences.get(key, 0) + 1
+        self._head = 0
+        self._tombstones = set()
+        self._live = len(self._items)
+        self._logged = 0
+
+    # -------------------------------
+    # Loading
+    # -------------------------------
+
+    def load(self, items=None):
+        """Load from disk (or from `items`) and replay the tombstone log"""
+        with self._lock:
+            if items is None and self.snapshot_file and os.path.exists(self.snapshot_file):
+                with open(self.snapshot_file, "rb") as f:
+                    raw = f.read()
+                self._digest = _digest(raw)
+                try:
+                    items = codec.loads(raw)
+                except Exception:
+                    items = []
+            self._rebase(items or [])
+            if self.log_file and os.path.exists(self.log_file):
+                with open(self.log_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        key = line.strip()
+                        if key.startswith("@"):
+                            if key[1:] != self._digest:
+                                break  # logged against another snapshot
+                            continue
+                        if key:
+                            self._tombstone(key)
+                            self._logged += 1
+        return self
+
+    # -------------------------------
+    # Reading
+    # -------------------------------
+
+    def items(self):
+        """Live pending businesses, in order"""
+        with self._lock:
+            tomb = self._tombstones
+            return [b for b, k in zip(self._items[self._head:], self._keys[self._head:]) if k not in tomb]
+
+    def __iter__(self):
+        return iter(self.items())
+
+    def __len__(self):
+        return self._live
+
+    def __bool__(self):
+        return self._live > 0
+
+    def __contains__(self, phone):
+        key = normalize_phone(phone)
+        return self._last_pos.get(key, -1) >= self._head and key not in self._tombstones
+
+    def __repr__(self):
+        return f"<PendingQueue live={self._live} head={self._head} tombstones={len(self._tombstones)}>"
+
+    # -------------------------------
+    # Writing
+    # -------------------------------
+
+    def reset(self, businesses):
+        """Replace the whole queue, e.g. after a new paste"""
+        with self._lock:
+            self._rebase(businesses)
+            self._persist(self._compact_files, list(self._items))
+
+    def remove(self, phone):
+        """Mark every entry with this phone as done. Returns False if it was not pending"""
+        key = normalize_phone(phone)
+        with self._lock:
+            if not self._tombstone(key):
+                return False
+            if self.log_file:
+                self._persist(self._append, key + "\n")
+                self._logged += 1
+                if self._logged >= self.compact_every:
+                    self._rebase(self.items())
+                    self._persist(self._compact_files, list(self._items))
+            return True
+
+    def remove_many(self, phones):
+        removed = 0
+        with self._lock:
+            for phone in phones:
+                removed += self.remove(phone)
+        return removed
+
+    def _tombstone(self, key):
+        if key in self._tombstones or self._last_pos.get(key, -1) < self._head:
+            return False
+        self._tombstones.add(key)
+        self._live -= self._occurrences[key]
+        # Advance the head past finished entries so the tombstone set stays small
+        while self._head < len(self._items) and self._keys[self._head] in self._tombstones:
+            done = self._keys[self._head]
+            self._head += 1
+            if self._last_pos[done] < self._head:
+                self._tombstones.discard(done)
+                # Keep it unknown for __contains__ / repeated removes
+                self._last_pos[done] = -1
+        return True
+
+    def _persist(self, fn, *args):
+        if not self.snapshot_file:
+            return
+        if self.writer is not None:
+            self.writer.call(fn, *args)
+        else:
+            fn(*args)
+
+    def _append(self, line):
+        if self._fh is None:
+            if not os.path.exists(self.log_file):
+                self._write_header()
+            self._fh = open(self.log_file, "a", encoding="utf-8")
+        self._fh.write(line)
+        self._fh.flush()
+
+    def _write_header(self):
+        """Start an empty log for the current snapshot, replacing the old one in one rename"""
+        tmp = self.log_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"@{self._digest}\n")
+        os.replace(tmp, self.log_file)
+
+    def _compact_files(self, snapshot):
+        self._digest = _digest(write_json_atomic(self.snapshot_file, snapshot))
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        # A crash before this line leaves the old log, whose header no longer
+        # matches the snapshot, so the next load skips it
+        if self.log_file:
+            self._write_header()
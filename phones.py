@@ -0,0 +1,47 @@
+import re
+from functools import lru_cache
+
+import config
+
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+@lru_cache(maxsize=200_000)
+def _normalize(raw):
+    text = raw.strip()
+    digits = _NON_DIGITS.sub("", text)
+    if not digits:
+        return ""
+    cc = config.DEFAULT_COUNTRY_CODE
+    nsn_len = config.NATIONAL_NUMBER_LENGTH
+    if text.startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    if digits.startswith("0") and len(digits) == nsn_len + 1:
+        # National format with trunk prefix: 0911223344
+        return "+" + cc + digits[1:]
+    if len(digits) == nsn_len:
+        # Bare national number: 911223344
+        return "+" + cc + digits
+    return "+" + digits
+
+
+def normalize_phone(raw):
+    """
+    Canonical E.164 key for a phone number as typed or scraped.
+
+    "+251 91 247 4806", "251912474806", "0912474806" and "912474806" all become
+    "+251912474806". Returns "" when there are no digits at all. Results are
+    memoized per raw string, so calling this in hot loops is cheap.
+    """
+    if raw is None:
+        return ""
+    return _normalize(str(raw))
+
+
+def wa_number(raw):
+    """Digits-only form expected by the web.whatsapp.com/send?phone= URL"""
+    return normalize_phone(raw).lstrip("+")
+
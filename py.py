@@ -1,11 +1,17 @@
+import multiprocessing
 from pages.whatsapp import WhatsAppApp
 import config
-from helper import load_all_state
+from helper import load_all_state, flush_writes
 
 # -------------------------------
 # Main
 # -------------------------------
 if __name__ == "__main__":
+    # Needed for the profile worker processes in a frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     load_all_state()
     app = WhatsAppApp()
     app.mainloop()
+    if app.sender is not None:
+        app.sender.shutdown()
+    flush_writes()
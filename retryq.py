@@ -0,0 +1,99 @@
+import random
+import time
+
+from failures import FailReason
+from phones import normalize_phone
+
+
+class RetryQueue:
+    """
+    Retries of transient failures and when each one is due.
+
+    Each failure reason has a policy (config.RETRY_POLICIES): how many
+    attempts in total, the first delay, its growth factor, a ceiling and a
+    +/- jitter fraction. Reasons without a policy (invalid_number) are never
+    retried, and failing with one ends the retries of an earlier reason. One
+    live entry per phone; failing again replaces it with the next attempt,
+    succeeding drops it. Once the attempts are used up the entry stays with
+    `due` None: the number is held back from new runs as well, until
+    `forget_after` seconds after its last attempt (`at`), when prune()
+    forgets it and a later failure starts the policy over.
+
+    `entries` ({phone: entry}) is what gets persisted as retry.json. A run
+    only drains the retries of the failures it had itself (due_among()), a
+    handful, so they are sorted when asked for rather than kept in a heap.
+    """
+
+    def __init__(self, entries=None, policies=None, forget_after=0):
+        self.policies = policies or {}
+        self.forget_after = forget_after
+        self.entries = {entry["phone"]: entry for entry in (entries or {}).values()}
+
+    def delay(self, reason, attempt):
+        """Seconds before retry number `attempt` (1-based), None when no retry is allowed"""
+        policy = self.policies.get(FailReason.coerce(reason)[0].value)
+        if policy is None or attempt >= policy["attempts"]:
+            return None
+        base = min(policy["max_delay"], policy["backoff"] * policy["factor"] ** (attempt - 1))
+        spread = policy.get("jitter", 0)
+        return base * random.uniform(1 - spread, 1 + spread)
+
+    def schedule(self, name, phone, reason, now=None):
+        """Record a failed attempt of `phone`, returns its entry (due None once exhausted) or None if not retryable"""
+        key = normalize_phone(phone)
+        if not key:
+            return None
+        reason = FailReason.coerce(reason)[0].value
+        if reason not in self.policies:
+            self.resolve(key)
+            return None
+        previous = self.entries.get(key)
+        attempt = previous["attempt"] + 1 if previous else 1
+        delay = self.delay(reason, attempt)
+        if delay is None and attempt == 1:
+            return None
+        now = time.time() if now is None else now
+        entry = {"businessName": name, "phone": key, "reason": reason, "attempt": attempt,
+                 "due": None if delay is None else now + delay, "at": now}
+        self.entries[key] = entry
+        return entry
+
+    def resolve(self, phone):
+        """`phone` went through (or was given up on), forget its retries"""
+        return self.entries.pop(normalize_phone(phone), None) is not None
+
+    def _given_up(self, entry, now):
+        """Exhausted and still within forget_after of its last attempt"""
+        return entry.get("due") is None and now - entry.get("at", 0) <= self.forget_after
+
+    def prune(self, now=None):
+        """Forget exhausted entries whose last attempt is older than forget_after, returns how many"""
+        now = time.time() if now is None else now
+        stale = [k for k, e in self.entries.items() if e.get("due") is None and not self._given_up(e, now)]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    def due_among(self, phones, now=None):
+        """
+        Scheduled entries of `phones`: (the due ones earliest first, epoch of
+        the next one that isn't due yet or None). Entries stay recorded until
+        resolved or rescheduled.
+        """
+        now = time.time() if now is None else now
+        scheduled = [self.entries[k] for k in map(normalize_phone, phones)
+                     if k in self.entries and self.entries[k].get("due") is not None]
+        scheduled.sort(key=lambda e: e["due"])
+        due = [e for e in scheduled if e["due"] <= now]
+        later = [e["due"] for e in scheduled if e["due"] > now]
+        return due, (later[0] if later else None)
+
+    def waiting(self, phone, now=None):
+        """True while `phone` is backing off (its next retry isn't due yet) or its retries ran out recently"""
+        entry = self.entries.get(normalize_phone(phone))
+        now = time.time() if now is None else now
+        if entry is None:
+            return False
+        if entry.get("due") is None:
+            return self._given_up(entry, now)
+        return entry["due"] > now
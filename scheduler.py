@@ -0,0 +1,150 @@
+import asyncio
+import math
+import os
+import random
+import time
+from datetime import date
+
+import codec
+from writer import write_json_atomic
+
+
+class DailyCapReached(Exception):
+    """The session opened as many chats today as config.DAILY_CAP allows"""
+
+
+def jitter(spec):
+    """
+    Draw a pause in seconds from a (distribution, a, b) spec:
+        ("uniform", low, high)
+        ("gauss", mean, stddev)
+        ("lognormal", median, sigma)    long right tail, never negative
+        ("exponential", minimum, mean_extra)
+    None or ("none", ...) means no pause.
+    """
+    if not spec:
+        return 0.0
+    kind, a, b = spec
+    if kind == "uniform":
+        value = random.uniform(a, b)
+    elif kind == "gauss":
+        value = random.gauss(a, b)
+    elif kind == "lognormal":
+        value = a * math.exp(random.gauss(0, b))
+    elif kind == "exponential":
+        value = a + (random.expovariate(1 / b) if b > 0 else 0)
+    elif kind == "none":
+        value = 0.0
+    else:
+        raise ValueError(f"Unknown jitter distribution {kind!r}")
+    return max(0.0, value)
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity` (the burst size)"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self.tokens = float(self.capacity)
+        self._stamp = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def delay(self):
+        """Seconds until a token is available, 0 if one is available now"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class RateScheduler:
+    """
+    Pacing for one WhatsApp session (browser profile).
+
+    Before each chat `wait_turn()` waits until both the per-minute and the
+    per-hour bucket have a token, takes one from each, enforces the daily cap
+    and then adds a random pause. Buckets start full, so the first `burst`
+    chats go out back to back. The day's count is kept in `state_file` so
+    restarting the app doesn't reset the cap.
+
+    All sending for a session runs on one event loop, so checking and taking
+    tokens between awaits needs no lock, even with several tabs.
+    """
+
+    def __init__(self, per_minute=0, per_hour=0, burst=1, daily_cap=0, chat_jitter=None, message_gap=None,
+                 state_file=None):
+        self.buckets = []
+        if per_minute > 0:
+            self.buckets.append(TokenBucket(per_minute / 60, burst))
+        if per_hour > 0:
+            self.buckets.append(TokenBucket(per_hour / 3600, burst))
+        self.daily_cap = daily_cap
+        self.chat_jitter = chat_jitter
+        self.message_gap_spec = message_gap
+        self.state_file = state_file
+        self._day, self._count = self._load_day()
+
+    async def wait_turn(self):
+        """Wait until this session may open the next chat. Raises DailyCapReached"""
+        while True:
+            # Checked right before taking tokens: other tabs may have used
+            # the last slots of the day while this one was waiting
+            self._roll_day()
+            if self.daily_cap and self._count >= self.daily_cap:
+                raise DailyCapReached(f"Daily cap of {self.daily_cap} chats reached")
+            wait = max((b.delay() for b in self.buckets), default=0.0)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        for bucket in self.buckets:
+            bucket.take()
+        self._count += 1
+        self._save_day()
+        await asyncio.sleep(jitter(self.chat_jitter))
+
+    async def message_gap(self):
+        """Pause between two messages of the same chat"""
+        await asyncio.sleep(jitter(self.message_gap_spec))
+
+    def sent_today(self):
+        self._roll_day()
+        return self._count
+
+    # -------------------------------
+    # Daily counter
+    # -------------------------------
+
+    def _roll_day(self):
+        today = date.today().isoformat()
+        if today != self._day:
+            self._day, self._count = today, 0
+
+    def _load_day(self):
+        today = date.today().isoformat()
+        if self.state_file and os.path.exists(self.state_file):
+            try:
+                state = codec.read_file(self.state_file)
+                if state.get("day") == today:
+                    return today, int(state.get("count", 0))
+            except Exception:
+                pass
+        return today, 0
+
+    def _save_day(self):
+        if not self.state_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            write_json_atomic(self.state_file, {"day": self._day, "count": self._count}, pretty=False)
+        except Exception as e:
+            print(f"Failed to save {self.state_file}: {e}")
@@ -0,0 +1,329 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from failures import FailureIndex
+from phones import normalize_phone
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS businesses (
+    id INTEGER PRIMARY KEY,
+    business_name TEXT,
+    phone TEXT NOT NULL,
+    phone_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    pending INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_businesses_phone_key ON businesses(phone_key);
+CREATE INDEX IF NOT EXISTS idx_businesses_pending ON businesses(pending, position);
+
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    template TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    result TEXT
+);
+
+CREATE TABLE IF NOT EXISTS outcomes (
+    id INTEGER PRIMARY KEY,
+    business_name TEXT,
+    phone TEXT NOT NULL,
+    phone_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    reason TEXT,
+    campaign_id INTEGER REFERENCES campaigns(id),
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outcomes_phone_key ON outcomes(phone_key, status);
+
+-- One row per (phone, reason), retries bump the counters instead of adding rows
+CREATE TABLE IF NOT EXISTS failures (
+    phone_key TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    business_name TEXT,
+    phone TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    first_at TEXT,
+    last_at TEXT,
+    last_error TEXT,
+    campaign_id INTEGER REFERENCES campaigns(id),
+    PRIMARY KEY (phone_key, reason)
+);
+"""
+
+UPSERT_FAILURE = """
+INSERT INTO failures (phone_key, reason, business_name, phone, attempts, first_at, last_at, last_error, campaign_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (phone_key, reason) DO UPDATE SET
+    attempts = attempts + excluded.attempts,
+    first_at = MIN(COALESCE(first_at, excluded.first_at), COALESCE(excluded.first_at, first_at)),
+    last_at = MAX(COALESCE(last_at, excluded.last_at), COALESCE(excluded.last_at, last_at)),
+    last_error = COALESCE(excluded.last_error, last_error),
+    business_name = COALESCE(excluded.business_name, business_name),
+    campaign_id = COALESCE(excluded.campaign_id, campaign_id)
+"""
+
+
+def phone_key(phone):
+    """Key used for the indexed phone columns"""
+    return normalize_phone(phone)
+
+
+class StateStore:
+    """
+    SQLite (WAL mode) storage for pending businesses, send outcomes and campaigns.
+
+    One connection is shared between the Tk thread and the sender thread, so
+    every statement runs under a lock. Lookups and single-row updates go through
+    the phone_key indexes instead of scanning whole lists.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._fold_failed_outcomes()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM businesses) + (SELECT COUNT(*) FROM outcomes)"
+                " + (SELECT COUNT(*) FROM failures)"
+            ).fetchone()
+        return row[0] == 0
+
+    # -------------------------------
+    # Pending businesses
+    # -------------------------------
+
+    def pending(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT business_name, phone FROM businesses WHERE pending = 1 ORDER BY position"
+            ).fetchall()
+        return [{"businessName": r["business_name"], "phone": r["phone"]} for r in rows]
+
+    def set_pending(self, businesses):
+        """Replace the pending queue with `businesses`, keeping their order"""
+        rows = [
+            (b.get("businessName"), str(b.get("phone", "")), phone_key(b.get("phone", "")), i)
+            for i, b in enumerate(businesses)
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM businesses WHERE pending = 1")
+            self._conn.executemany(
+                "INSERT INTO businesses (business_name, phone, phone_key, position) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def remove_pending(self, phone):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE businesses SET pending = 0 WHERE phone_key = ? AND pending = 1",
+                (phone_key(phone),),
+            )
+
+    def remove_pending_many(self, phones):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE businesses SET pending = 0 WHERE phone_key = ? AND pending = 1",
+                [(phone_key(p),) for p in phones],
+            )
+
+    # -------------------------------
+    # Outcomes
+    # -------------------------------
+
+    def add_outcome(self, name, phone, status, reason=None, campaign_id=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO outcomes (business_name, phone, phone_key, status, reason, campaign_id, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, str(phone), phone_key(phone), status, reason, campaign_id, time.time()),
+            )
+
+    def add_outcomes(self, entries, status):
+        """Bulk insert of {"businessName", "phone", "reason"} dicts, used for imports"""
+        now = time.time()
+        rows = [
+            (e.get("businessName"), str(e.get("phone", "")), phone_key(e.get("phone", "")),
+             status, e.get("reason"), None, now)
+            for e in entries
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO outcomes (business_name, phone, phone_key, status, reason, campaign_id, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def is_contacted(self, phone):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outcomes WHERE phone_key = ? AND status = 'contacted' LIMIT 1",
+                (phone_key(phone),),
+            ).fetchone()
+        return row is not None
+
+    def contacted_among(self, phones):
+        """Subset of `phones` that already have a 'contacted' outcome"""
+        by_key = {}
+        for phone in phones:
+            by_key.setdefault(phone_key(phone), []).append(phone)
+        keys = list(by_key)
+        found = set()
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT DISTINCT phone_key FROM outcomes WHERE status = 'contacted' AND phone_key IN ({marks})",
+                    chunk,
+                ).fetchall()
+                for r in rows:
+                    found.update(by_key[r[0]])
+        return found
+
+    def outcomes(self, status):
+        """Full rows for one status, only meant for exports and reports"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT business_name, phone, reason FROM outcomes WHERE status = ? ORDER BY id",
+                (status,),
+            ).fetchall()
+        entries = []
+        for r in rows:
+            entry = {"businessName": r["business_name"], "phone": r["phone"]}
+            if r["reason"]:
+                entry["reason"] = r["reason"]
+            entries.append(entry)
+        return entries
+
+    def rekey_phones(self, dry_run=False):
+        """
+        Recompute every phone_key, needed after the normalization rules change.
+        Returns (rekeyed, collapsed): how many rows got a new key, and the
+        (phone, kept phone) pairs of failure rows merged into another one.
+        """
+        with self._lock, self._conn:
+            rekeyed = 0
+            for table in ("businesses", "outcomes"):
+                rows = self._conn.execute(f"SELECT id, phone, phone_key FROM {table}").fetchall()
+                changed = [(phone_key(r["phone"]), r["id"]) for r in rows if phone_key(r["phone"]) != r["phone_key"]]
+                rekeyed += len(changed)
+                if not dry_run:
+                    self._conn.executemany(f"UPDATE {table} SET phone_key = ? WHERE id = ?", changed)
+            # Failures are keyed by phone, rows whose keys now agree are merged
+            rows = self._failure_rows()
+            seen = {}
+            collapsed = []
+            for r in rows:
+                ident = (phone_key(r["phone"]) or str(r["phone"]), r["reason"])
+                if ident in seen:
+                    collapsed.append((r["phone"], seen[ident]))
+                else:
+                    seen[ident] = r["phone"]
+            if not dry_run:
+                self._conn.execute("DELETE FROM failures")
+                self._upsert_failures(FailureIndex(rows).entries)
+        return rekeyed, collapsed
+
+    # -------------------------------
+    # Failures
+    # -------------------------------
+
+    def add_failure(self, name, phone, reason, error=None, campaign_id=None):
+        """Count one failed attempt for (phone, reason); `reason` is a failures.FailReason value"""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.execute(
+                UPSERT_FAILURE,
+                (phone_key(phone) or str(phone), reason, name, str(phone), 1, now, now, error, campaign_id),
+            )
+
+    def add_failure_many(self, items, reason, campaign_id=None):
+        """One failed attempt for each (name, phone) in `items`, all with the same reason"""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT_FAILURE, [
+                (phone_key(phone) or str(phone), reason, name, str(phone), 1, now, now, None, campaign_id)
+                for name, phone in items
+            ])
+
+    def add_failures(self, entries):
+        """Bulk upsert of aggregated rows (see failures.FailureIndex), used for imports"""
+        with self._lock, self._conn:
+            self._upsert_failures(entries)
+
+    def failures(self):
+        """Aggregated failure rows in the same shape as failed.json"""
+        with self._lock:
+            return self._failure_rows()
+
+    def _upsert_failures(self, entries):
+        self._conn.executemany(UPSERT_FAILURE, [
+            (phone_key(e.get("phone", "")) or str(e.get("phone", "")), e["reason"], e.get("businessName"),
+             str(e.get("phone", "")), e.get("attempts", 1), e.get("firstAt"), e.get("lastAt"),
+             e.get("lastError"), None)
+            for e in entries
+        ])
+
+    def _failure_rows(self):
+        rows = self._conn.execute(
+            "SELECT business_name, phone, reason, attempts, first_at, last_at, last_error"
+            " FROM failures ORDER BY first_at"
+        ).fetchall()
+        return [
+            {"businessName": r["business_name"], "phone": r["phone"], "reason": r["reason"],
+             "attempts": r["attempts"], "firstAt": r["first_at"], "lastAt": r["last_at"],
+             "lastError": r["last_error"]}
+            for r in rows
+        ]
+
+    def _fold_failed_outcomes(self):
+        """Older databases kept one outcomes row per failed attempt, aggregate them once"""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT business_name, phone, reason, created_at FROM outcomes WHERE status = 'failed' ORDER BY id"
+            ).fetchall()
+            if not rows:
+                return
+            index = FailureIndex(
+                {"businessName": r["business_name"], "phone": r["phone"], "reason": r["reason"],
+                 "at": datetime.fromtimestamp(r["created_at"]).isoformat(timespec="seconds")}
+                for r in rows
+            )
+            self._upsert_failures(index.entries)
+            self._conn.execute("DELETE FROM outcomes WHERE status = 'failed'")
+
+    # -------------------------------
+    # Campaigns
+    # -------------------------------
+
+    def start_campaign(self, template):
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO campaigns (template, started_at) VALUES (?, ?)",
+                (template, time.time()),
+            )
+        return cur.lastrowid
+
+    def finish_campaign(self, campaign_id, result):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE campaigns SET finished_at = ?, result = ? WHERE id = ?",
+                (time.time(), result, campaign_id),
+            )
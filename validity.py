@@ -0,0 +1,84 @@
+import time
+from datetime import datetime
+
+from failures import FailReason
+from phones import normalize_phone
+
+
+# What opening a number's chat showed
+ON_WHATSAPP = "on_whatsapp"
+INVALID = "invalid"
+
+
+def _epoch(iso, default):
+    try:
+        return datetime.fromisoformat(iso).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+class ValidityCache:
+    """
+    Last observed validity per normalized phone: {"status", "at", "ttl"} with
+    `at` in epoch seconds. An entry older than its ttl is treated as unknown,
+    so a number that was invalid a month ago gets looked at again.
+    `entries` is the dict that is persisted as validity.json.
+    """
+
+    def __init__(self, entries=None, ttls=None):
+        self.entries = entries if entries is not None else {}
+        self.ttls = ttls or {}
+        self.lookups = 0
+        self.hits = 0
+
+    def peek(self, phone, now=None):
+        """Fresh status of `phone` or None"""
+        entry = self.entries.get(normalize_phone(phone))
+        now = time.time() if now is None else now
+        if entry is None or now - entry.get("at", 0) > entry.get("ttl", 0):
+            return None
+        return entry["status"]
+
+    def lookup(self, phone, now=None):
+        """peek() counted for the hit rate"""
+        self.lookups += 1
+        status = self.peek(phone, now)
+        if status is not None:
+            self.hits += 1
+        return status
+
+    def record(self, phone, status, at=None):
+        key = normalize_phone(phone)
+        if not key:
+            return None
+        entry = {"status": status, "at": time.time() if at is None else at, "ttl": self.ttls.get(status, 0)}
+        self.entries[key] = entry
+        return entry
+
+    def seed_from_failures(self, rows):
+        """
+        Numbers failed.json already knows to be invalid, unless observed since.
+        Rows without a timestamp (legacy) are skipped: aged from "now" on every
+        start they would never expire and never be looked at again.
+        """
+        for row in rows:
+            key = normalize_phone(row.get("phone"))
+            if key and key not in self.entries and row.get("reason") == FailReason.INVALID_NUMBER.value:
+                at = _epoch(row.get("lastAt"), None)
+                if at is not None:
+                    self.record(key, INVALID, at=at)
+
+    def prune(self, now=None):
+        """Drop expired entries, returns how many"""
+        now = time.time() if now is None else now
+        stale = [k for k, e in self.entries.items() if now - e.get("at", 0) > e.get("ttl", 0)]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.hits = 0
+
+    def hit_rate(self):
+        return round(self.hits / self.lookups, 3) if self.lookups else 0.0
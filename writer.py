@@ -0,0 +1,91 @@
+import collections
+import copy
+import os
+import threading
+
+import codec
+
+
+def write_json_atomic(filename, data, pretty=None):
+    """Write to a temp file next to `filename` and rename it into place, returns the bytes written"""
+    raw = codec.dumps(data, pretty)
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+    os.replace(tmp, filename)
+    return raw
+
+
+class PersistenceWriter:
+    """
+    Single background thread that owns all state-file writes.
+
+    `save()` queues a snapshot of a whole file. If an older snapshot of the same
+    file is still waiting it is simply replaced (last write wins), so a burst of
+    saves costs one write. `call()` runs arbitrary file work (journal appends,
+    compactions) on the same thread, in submission order. Callers never touch
+    the disk themselves; `flush()` waits for everything queued so far.
+
+    Queuing never blocks, so the send loop can't stall on a slow disk. Past
+    `maxsize` queued items `backlogged()` turns True; producers that can wait
+    (see helper.wait_for_writer) then flush before adding more. Payloads are
+    deep-copied when queued, later in-place changes never reach the thread.
+    """
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._unfinished = 0
+        self._snapshots = {}
+        self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self._thread.start()
+
+    def save(self, filename, data):
+        """Queue `data` to be written to `filename`"""
+        snapshot = copy.deepcopy(data)
+        with self._cond:
+            already_queued = filename in self._snapshots
+            self._snapshots[filename] = snapshot
+            if not already_queued:
+                self._put(("save", filename))
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the writer thread after everything queued before it"""
+        args = copy.deepcopy(args)
+        with self._cond:
+            self._put(("call", fn, args))
+
+    def _put(self, item):
+        # Condition held
+        self._items.append(item)
+        self._unfinished += 1
+        self._cond.notify_all()
+
+    def backlogged(self):
+        """True while more than `maxsize` items wait for the thread"""
+        return len(self._items) > self.maxsize
+
+    def flush(self):
+        """Block until every queued write has hit the disk"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._unfinished == 0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._items)
+                item = self._items.popleft()
+                if item[0] == "save":
+                    data = self._snapshots.pop(item[1])
+            try:
+                if item[0] == "save":
+                    write_json_atomic(item[1], data)
+                else:
+                    item[1](*item[2])
+            except Exception as e:
+                print(f"Background write failed: {e}")
+            finally:
+                with self._cond:
+                    self._unfinished -= 1
+                    self._cond.notify_all()